@@ -0,0 +1,61 @@
+import threading
+import pygame
+from singleton import Singleton
+
+
+class AssetCache(metaclass = Singleton):
+    def __init__(self):
+        self._images = {}
+        self._lock = threading.RLock()
+        self._unconverted = set()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, path, flip_x=False, flip_y=False, convert=True):
+        key = (path, flip_x, flip_y)
+        with self._lock:
+            picture = self._images.get(key)
+            if picture is None:
+                self._misses += 1
+                if flip_x or flip_y:
+                    picture = pygame.transform.flip(
+                        self.get(path, convert=convert), flip_x, flip_y)
+                else:
+                    picture = pygame.image.load(path)
+                self._store(key, picture, convert)
+            else:
+                self._hits += 1
+                if convert and key in self._unconverted:
+                    self._store(key, picture, convert)
+            return self._images[key]
+
+    def _store(self, key, picture, convert):
+        if not convert or pygame.display.get_surface() is None:
+            self._images[key] = picture
+            self._unconverted.add(key)
+            return
+        if picture.get_flags() & pygame.SRCALPHA:
+            self._images[key] = picture.convert_alpha()
+        else:
+            self._images[key] = picture.convert()
+        self._unconverted.discard(key)
+
+    def preload(self, paths, convert=True):
+        for path in paths:
+            self.get(path, convert=convert)
+
+    def get_stats(self):
+        held = 0
+        with self._lock:
+            pictures = list(self._images.values())
+        for picture in pictures:
+            held += picture.get_pitch() * picture.get_height()
+        return {"hits": self._hits, "misses": self._misses,
+                "entries": len(self._images), "bytes": held}
+
+    def clear(self):
+        with self._lock:
+            self._images.clear()
+            self._unconverted.clear()
+            self._hits = 0
+            self._misses = 0
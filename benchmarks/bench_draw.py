@@ -0,0 +1,43 @@
+import os
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pygame
+import pygame.freetype
+from gamesettings import *
+from simulation import Simulation
+
+FRAMES = 3000
+
+
+def run(screen, font, lane_strips):
+    simulation = Simulation(0, screen, font)
+    objects = simulation.get_objects()
+    objects.set_lane_strips(lane_strips)
+    calls = 0
+    elapsed = 0
+    for frame in range(FRAMES):
+        if simulation.is_done():
+            simulation.reset(frame)
+            objects = simulation.get_objects()
+            objects.set_lane_strips(lane_strips)
+        simulation.step([False, False, False, False], False)
+        start = time.perf_counter()
+        simulation.draw()
+        elapsed += time.perf_counter() - start
+        calls += objects.get_draw_calls()
+    return elapsed / FRAMES, calls / FRAMES
+
+
+if __name__ == "__main__":
+    pygame.init()
+    screen = pygame.display.set_mode((SCREENWIDTH, SCREENHEIGHT))
+    font = pygame.freetype.Font("./data/Connection.otf", 24)
+    sprites, sprite_calls = run(screen, font, False)
+    strips, strip_calls = run(screen, font, True)
+    print("per-object blits: %8.1f us/frame, %5.1f draw calls" % (sprites * 1e6, sprite_calls))
+    print("lane strips:      %8.1f us/frame, %5.1f draw calls" % (strips * 1e6, strip_calls))
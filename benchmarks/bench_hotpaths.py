@@ -0,0 +1,188 @@
+import gc
+import json
+import os
+import platform
+import sqlite3
+import sys
+import tempfile
+import timeit
+import tracemalloc
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pygame
+import pygame.freetype
+from gameobjects import *
+from gamesettings import *
+from levels import compile_level
+from menulogic import Highscore, ScoreboardCaretaker
+from scorestore import ScoreStore, ScoreboardService
+from simulation import Simulation
+
+BASELINE = os.environ.get("BENCH_BASELINE", "./benchmarks/baseline.json")
+SAVE = os.environ.get("BENCH_SAVE", "") == "1"
+THRESHOLD = float(os.environ.get("BENCH_THRESHOLD", 0.25))
+REPEATS = int(os.environ.get("BENCH_REPEATS", 5))
+ALLOCATION_OPS = 200
+SCALES = (1, 10, 100)
+SCORE_ROWS = int(os.environ.get("BENCH_SCORE_ROWS", 10000))
+SCORE_OPS = 100
+
+
+# A level scaled by N holds N copies of every lane. Copy k sits k screen
+# heights below the original, so each copy has its own lane bands and the
+# copies past the first are drawn (and clipped) off screen.
+def scale_level(data, factor):
+    lanes = []
+    for copy in range(factor):
+        for lane in data["lanes"]:
+            lanes.append(dict(lane, y=lane["y"] + copy * SCREENHEIGHT))
+    return compile_level(dict(data, lanes=lanes))
+
+
+def create_world(level, screen, font):
+    simulation = Simulation(0, screen, font, level)
+    objects = simulation.get_objects()
+    player = simulation.get_player()
+    manatees = [object for object in objects.get_movables() if isinstance(object, Manatees)]
+
+    def transitions():
+        for group in manatees:
+            group.check_collisions(player)
+
+    return {
+        "move": objects.move_objects,
+        "collide": objects.collide_objects,
+        "draw": objects.draw_objects,
+        "draw_score": objects.draw_score,
+        "manatee_transitions": transitions,
+    }
+
+
+# Score operations run SCORE_OPS times per repeat against a database and
+# ranking of SCORE_ROWS entries, which are trimmed back before every repeat.
+def create_score_database(path):
+    ScoreStore(path).add_many((score, "seed") for score in range(SCORE_ROWS))
+    connection = sqlite3.connect(path, isolation_level=None)
+
+    def trim():
+        connection.execute("DELETE FROM scores WHERE id > ?", (SCORE_ROWS,))
+
+    return connection, trim
+
+
+def create_scoreboard(directory):
+    store_path = os.path.join(directory, "store.db")
+    store_connection, trim_store = create_score_database(store_path)
+    store = ScoreStore(store_path)
+    service = ScoreboardService(ScoreStore(store_path))
+    caretaker_path = os.path.join(directory, "caretaker.db")
+    caretaker_connection, trim_caretaker = create_score_database(caretaker_path)
+    caretaker = ScoreboardCaretaker(None, caretaker_path)
+    highscore = Highscore(1234, "bench")
+
+    def reset_caretaker():
+        caretaker.flush()
+        trim_caretaker()
+        caretaker.restore()
+
+    operations = {
+        "store_add_many": (lambda: store.add_many([(1234, "bench")]), trim_store),
+        "store_top": (lambda: store.top(SCOREBOARD_SIZE), None),
+        "service_reload": (service.reload, None),
+        "caretaker_create": (lambda: caretaker.create(highscore), reset_caretaker),
+        "caretaker_restore": (caretaker.restore, reset_caretaker),
+    }
+
+    def close():
+        for closable in (caretaker, service, store, store_connection, caretaker_connection):
+            closable.close()
+
+    return operations, close
+
+
+def measure(operation, reset=None, number=None):
+    if reset is None:
+        reset = lambda: None
+    timer = timeit.Timer(operation)
+    if number is None:
+        reset()
+        number, _ = timer.autorange()
+    times = []
+    for _ in range(REPEATS):
+        reset()
+        times.append(timer.timeit(number))
+    best = min(times) / number
+    reset()
+    gc.collect()
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    tracemalloc.reset_peak()
+    for _ in range(min(ALLOCATION_OPS, number)):
+        operation()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"ns_per_op": best * 1e9,
+            "alloc_net_bytes_per_op": (current - start) / min(ALLOCATION_OPS, number),
+            "alloc_peak_bytes": peak - start}
+
+
+def run_suite():
+    pygame.init()
+    screen = pygame.display.set_mode((SCREENWIDTH, SCREENHEIGHT))
+    font = pygame.freetype.Font("./data/Connection.otf", 24)
+    with open(DEFAULT_LEVEL) as f:
+        level_data = json.load(f)
+    results = {}
+    for factor in SCALES:
+        world = "standard" if factor == 1 else "lanes_x%d" % factor
+        for phase, operation in create_world(scale_level(level_data, factor), screen, font).items():
+            results[world + "/" + phase] = measure(operation)
+            print_result(world + "/" + phase, results[world + "/" + phase])
+    with tempfile.TemporaryDirectory() as directory:
+        operations, close = create_scoreboard(directory)
+        for phase, (operation, reset) in operations.items():
+            results["scoreboard/" + phase] = measure(operation, reset, SCORE_OPS)
+            print_result("scoreboard/" + phase, results["scoreboard/" + phase])
+        close()
+    return results
+
+
+def print_result(name, result):
+    print("%-36s %12.0f ns/op %10.1f B/op net %10d B peak" % (
+        name, result["ns_per_op"], result["alloc_net_bytes_per_op"], result["alloc_peak_bytes"]))
+
+
+def find_regressions(results, baseline):
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        if result["ns_per_op"] > previous["ns_per_op"] * (1 + THRESHOLD):
+            regressions.append("%s: %.0f ns/op, baseline %.0f ns/op" % (
+                name, result["ns_per_op"], previous["ns_per_op"]))
+        if result["alloc_peak_bytes"] > previous["alloc_peak_bytes"] * (1 + THRESHOLD) + 1024:
+            regressions.append("%s: %d B peak, baseline %d B peak" % (
+                name, result["alloc_peak_bytes"], previous["alloc_peak_bytes"]))
+    return regressions
+
+
+if __name__ == "__main__":
+    results = run_suite()
+    if SAVE or not os.path.exists(BASELINE):
+        with open(BASELINE, 'w') as f:
+            json.dump({"python": platform.python_version(), "pygame": pygame.version.ver,
+                       "results": results}, f, indent=1)
+        print("baseline saved to " + BASELINE)
+        sys.exit(0)
+    with open(BASELINE) as f:
+        baseline = json.load(f)["results"]
+    regressions = find_regressions(results, baseline)
+    for regression in regressions:
+        print("REGRESSION " + regression)
+    if regressions:
+        sys.exit(1)
+    print("OK: no hot path regressed more than %d%%" % (THRESHOLD * 100))
@@ -0,0 +1,53 @@
+import os
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pygame
+import pygame.freetype
+from gamesettings import *
+from hudtext import HudText
+
+FRAMES = 5000
+
+
+def draw_score_uncached(screen, font, lives, score):
+    pygame.draw.rect(screen, (0, 0, 0), (0, 704, SCREENWIDTH, 64), 0)
+    text_surface, rect = font.render(
+        "Lives amount: " + str(lives), (255, 255, 255))
+    rect = text_surface.get_rect(midtop = (SCREENWIDTH/3, 725))
+    screen.blit(text_surface, rect)
+    text_surface, rect = font.render(
+        "Score: " + str(score), (255, 255, 255))
+    rect = text_surface.get_rect(midtop = (2*SCREENWIDTH/3, 725))
+    screen.blit(text_surface, rect)
+
+
+def draw_score_cached(screen, hud_text, lives, score):
+    pygame.draw.rect(screen, (0, 0, 0), (0, 704, SCREENWIDTH, 64), 0)
+    hud_text.draw_line(
+        screen, "Lives amount: " + str(lives), (SCREENWIDTH/3, 725))
+    hud_text.draw_counter(
+        screen, "Score: ", score, (2*SCREENWIDTH/3, 725))
+
+
+def run(draw, target):
+    start = time.perf_counter()
+    for frame in range(FRAMES):
+        draw(screen, target, 4 - frame // 2000, 5000 - frame)
+    return (time.perf_counter() - start) / FRAMES
+
+
+if __name__ == "__main__":
+    pygame.init()
+    screen = pygame.display.set_mode((SCREENWIDTH, SCREENHEIGHT))
+    font = pygame.freetype.Font("./data/Connection.otf", 24)
+    uncached = run(draw_score_uncached, font)
+    cached = run(draw_score_cached, HudText(font, (255, 255, 255)))
+    print("uncached draw_score: %8.1f us/frame" % (uncached * 1e6))
+    print("cached draw_score:   %8.1f us/frame" % (cached * 1e6))
+    print("saved per frame:     %8.1f us (%.1fx)" % (
+        (uncached - cached) * 1e6, uncached / cached))
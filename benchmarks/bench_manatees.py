@@ -0,0 +1,161 @@
+import os
+import random
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pygame
+from gameobjects import *
+from gamesettings import *
+
+GROUPS = int(os.environ.get("MANATEE_GROUPS", 500))
+TICKS = 2000
+SUBMERGE_TICKS = 60
+
+
+class LegacyManatees():
+    def __init__(self, rect, speed, phase_ticks, submerge_ticks):
+        self._rect = rect
+        self._speed = speed
+        self._phase_ticks = phase_ticks
+        self._submerge_ticks = submerge_ticks
+        self._stood_on = False
+        self.change_state(LEGACY_FLOATING)
+
+    def check_collisions(self, player):
+        return self._state.collision_handle(self, player)
+
+    def change_state(self, state):
+        self._state = state
+
+
+class LegacyState():
+    __slots__ = ()
+
+    def collision_handle(self, manatees, player):
+        pass
+
+
+class LegacyStateFloating(LegacyState):
+    def collision_handle(self, manatees, player):
+        manatees._phase_ticks += 1
+        if manatees._phase_ticks == 2 * manatees._submerge_ticks:
+            manatees.change_state(LEGACY_SUBMERGING1)
+        if manatees._rect.colliderect(player.get_rect()):
+            if manatees._stood_on == False:
+                player.surface_count_delta(1)
+                player.surface_speed_delta(manatees._speed)
+                manatees._stood_on = True
+        elif manatees._stood_on == True:
+            player.surface_count_delta(-1)
+            player.surface_speed_delta(-manatees._speed)
+            manatees._stood_on = False
+        return 0
+
+
+class LegacyStateSubmerging1(LegacyState):
+    def collision_handle(self, manatees, player):
+        manatees._phase_ticks += 1
+        if manatees._phase_ticks == 2.5 * manatees._submerge_ticks:
+            manatees.change_state(LEGACY_SUBMERGING2)
+        if manatees._rect.colliderect(player.get_rect()):
+            if manatees._stood_on == False:
+                player.surface_count_delta(1)
+                player.surface_speed_delta(manatees._speed)
+                manatees._stood_on = True
+        elif manatees._stood_on == True:
+            player.surface_count_delta(-1)
+            player.surface_speed_delta(-manatees._speed)
+            manatees._stood_on = False
+        return 0
+
+
+class LegacyStateSubmerging2(LegacyState):
+    def collision_handle(self, manatees, player):
+        manatees._phase_ticks += 1
+        if manatees._phase_ticks == 3 * manatees._submerge_ticks:
+            manatees.change_state(LEGACY_SUBMERGED)
+        if manatees._rect.colliderect(player.get_rect()):
+            if manatees._stood_on == False:
+                player.surface_count_delta(1)
+                player.surface_speed_delta(manatees._speed)
+                manatees._stood_on = True
+        elif manatees._stood_on == True:
+            player.surface_count_delta(-1)
+            player.surface_speed_delta(-manatees._speed)
+            manatees._stood_on = False
+        return 0
+
+
+class LegacyStateSubmerged(LegacyState):
+    def collision_handle(self, manatees, player):
+        manatees._phase_ticks += 1
+        if manatees._phase_ticks == 4 * manatees._submerge_ticks:
+            manatees._phase_ticks = 0
+            manatees.change_state(LEGACY_FLOATING)
+        if manatees._stood_on == True:
+            player.surface_count_delta(-1)
+            player.surface_speed_delta(-manatees._speed)
+            manatees._stood_on = False
+        return 0
+
+
+LEGACY_FLOATING = LegacyStateFloating()
+LEGACY_SUBMERGING1 = LegacyStateSubmerging1()
+LEGACY_SUBMERGING2 = LegacyStateSubmerging2()
+LEGACY_SUBMERGED = LegacyStateSubmerged()
+
+
+def create_groups(rng):
+    sprites = ["./data/manatees%d.png" % i for i in range(1, 5)]
+    legacy = []
+    table = []
+    for group in range(GROUPS):
+        x = rng.randrange(-256, SCREENWIDTH)
+        phase = rng.randrange(2 * SUBMERGE_TICKS)
+        legacy.append(LegacyManatees(
+            pygame.Rect(x, 128, 256, 64), -3.5, phase, SUBMERGE_TICKS))
+        table.append(Manatees(x, 128, -3.5, sprites, 256, phase, SUBMERGE_TICKS))
+    return legacy, table
+
+
+def run_groups(groups, player):
+    start = time.perf_counter()
+    for tick in range(TICKS):
+        for group in groups:
+            group.check_collisions(player)
+    return (time.perf_counter() - start) / (TICKS * len(groups))
+
+
+def run_batch(table, phases):
+    start = time.perf_counter()
+    for tick in range(TICKS):
+        phases = table.advance(phases)
+    return (time.perf_counter() - start) / (TICKS * len(phases)), phases
+
+
+if __name__ == "__main__":
+    pygame.init()
+    pygame.display.set_mode((SCREENWIDTH, SCREENHEIGHT))
+    legacy, groups = create_groups(random.Random(0))
+    player = PlayerCharacter(267, 140, 4)
+    legacy_time = run_groups(legacy, player)
+    legacy_speed = player.get_surface_speed()
+    player = PlayerCharacter(267, 140, 4)
+    table_time = run_groups(groups, player)
+    for old, new in zip(legacy, groups):
+        if old._phase_ticks % new.get_table().get_period() != new.get_phase_ticks():
+            raise SystemExit("phase mismatch between state classes and phase table")
+    if player.get_surface_speed() != legacy_speed:
+        raise SystemExit("surface speed mismatch between state classes and phase table")
+    batch_time, phases = run_batch(
+        get_manatee_table(SUBMERGE_TICKS), [group.get_phase_ticks() for group in groups])
+    print("manatee groups:        %8d x %d ticks" % (GROUPS, TICKS))
+    print("state classes:         %8.1f ns/group-tick" % (legacy_time * 1e9))
+    print("phase table:           %8.1f ns/group-tick (%.2fx)" % (
+        table_time * 1e9, legacy_time / table_time))
+    print("phase table, batched:  %8.1f ns/group-tick (%.2fx)" % (
+        batch_time * 1e9, legacy_time / batch_time))
@@ -0,0 +1,54 @@
+import os
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from menulogic import *
+
+REPEATS = 50
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def show(game, menu):
+    menu.enable()
+    menu.draw(game._screen)
+
+
+if __name__ == "__main__":
+    game, startup = timed(Game)
+    print("Game() startup:           %8.2f ms" % startup)
+    factory = game._menu_creator
+    scoreboard = game.load_scoreboard()
+    openers = {
+        "start": lambda: factory.get_start_menu(),
+        "end": lambda: factory.get_end_menu(1234, True),
+        "save": lambda: factory.get_save_menu(),
+        "scoreboard": lambda: factory.get_scoreboard_menu(scoreboard),
+    }
+    builders = {
+        "start": factory.create_start_menu,
+        "end": factory.create_end_menu,
+        "save": factory.create_save_menu,
+        "scoreboard": factory.create_scoreboard_menu,
+    }
+    for name, opener in openers.items():
+        menu, first = timed(opener)
+        show(game, menu)
+        start = time.perf_counter()
+        for _ in range(REPEATS):
+            show(game, opener())
+        reused = (time.perf_counter() - start) * 1000 / REPEATS
+        start = time.perf_counter()
+        for _ in range(REPEATS):
+            show(game, builders[name]()[0])
+        rebuilt = (time.perf_counter() - start) * 1000 / REPEATS
+        print("%-10s first open %7.2f ms, reopen %6.2f ms, rebuild %6.2f ms" % (
+            name, first, reused, rebuilt))
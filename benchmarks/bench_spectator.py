@@ -0,0 +1,132 @@
+import asyncio
+import os
+import random
+import sys
+import threading
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pygame
+from gameobjects import *
+from gamesettings import *
+from simulation import Simulation
+from spectator import (SpectatorClient, SpectatorServer, capture_state, encode_state,
+                       get_houses, get_manatees, predict_state)
+
+SPECTATORS = int(os.environ.get("BENCH_SPECTATORS", 48))
+ROUNDS = int(os.environ.get("BENCH_ROUNDS", 5))
+MAX_TICKS = int(os.environ.get("BENCH_TICKS", 2000))
+SEED = int(os.environ.get("BENCH_SEED", 7))
+TIMEOUT = 10.0
+JOIN_TICK = 5
+
+
+def start_clients(loop, address, count, tasks):
+    clients = [SpectatorClient() for _ in range(count)]
+    for client in clients:
+        tasks.append(asyncio.run_coroutine_threadsafe(client.run(address), loop))
+    return clients
+
+
+def join_clients(server, clients, joined):
+    clients += joined
+    wait_for(lambda: server.get_clients() == len(clients))
+
+
+def wait_for(condition):
+    deadline = time.perf_counter() + TIMEOUT
+    while not condition():
+        if time.perf_counter() > deadline:
+            return False
+        time.sleep(0.001)
+    return True
+
+
+async def stop_clients():
+    tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def world_key(objects, manatees, houses):
+    return (capture_state(objects, manatees, houses),
+            tuple(tuple(object.get_rect()) for object in objects.get_movables()))
+
+
+def play_round(server, seed, rng, join=None):
+    simulation = Simulation(seed)
+    objects = simulation.get_objects()
+    manatees = get_manatees(objects)
+    houses = get_houses(objects)
+    tables = tuple(group.get_table() for group in manatees)
+    server.start_round(seed, DEFAULT_LEVEL, objects)
+    publish_time = 0.0
+    message_bytes = 0
+    previous = None
+    result = None
+    while result is None and simulation.get_ticks() < MAX_TICKS:
+        arrows = [rng.random() < 0.1, rng.random() < 0.02, rng.random() < 0.05, rng.random() < 0.05]
+        result = simulation.step(arrows, False)
+        start = time.perf_counter()
+        server.publish(objects)
+        publish_time += time.perf_counter() - start
+        state = capture_state(objects, manatees, houses)
+        predicted = None if previous is None else predict_state(previous, tables)
+        message_bytes += len(encode_state(state, predicted))
+        previous = state
+        if join is not None and simulation.get_ticks() == JOIN_TICK:
+            join()
+    server.end_round(0 if result is None else result)
+    return simulation, world_key(objects, manatees, houses), publish_time, message_bytes
+
+
+def check_clients(clients, simulation, key):
+    in_sync = 0
+    for client in clients:
+        replica = client.get_simulation()
+        if replica is None or client.get_tick() != simulation.get_ticks():
+            continue
+        objects = replica.get_objects()
+        if world_key(objects, get_manatees(objects), get_houses(objects)) == key:
+            in_sync += 1
+    return in_sync
+
+
+if __name__ == "__main__":
+    pygame.init()
+    pygame.display.set_mode((SCREENWIDTH, SCREENHEIGHT))
+    server = SpectatorServer((SPECTATOR_HOST, 0))
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    address = server.get_address()[:2]
+    tasks = []
+    clients = start_clients(loop, address, SPECTATORS // 2, tasks)
+    wait_for(lambda: server.get_clients() == len(clients))
+    rng = random.Random(SEED)
+    failed = False
+    for round_index in range(ROUNDS):
+        join = None
+        if round_index == 1:
+            join = lambda: join_clients(server, clients, start_clients(loop, address, SPECTATORS - len(clients), tasks))
+        simulation, key, publish_time, message_bytes = play_round(server, rng.getrandbits(64), rng, join)
+        ticks = max(simulation.get_ticks(), 1)
+        wait_for(lambda: all(client.get_result() is not None and client.get_tick() == simulation.get_ticks()
+                             for client in clients))
+        in_sync = check_clients(clients, simulation, key)
+        print("round %d: %4d ticks, %d/%d spectators in sync, publish %6.1f us/tick, %5.1f B/tick" % (
+            round_index, simulation.get_ticks(), in_sync, len(clients),
+            publish_time / ticks * 1e6, message_bytes / ticks))
+        failed = failed or in_sync != len(clients)
+    print("dropped spectators: %d" % server.get_dropped())
+    asyncio.run_coroutine_threadsafe(stop_clients(), loop).result()
+    server.close()
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    loop.close()
+    pygame.quit()
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,36 @@
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+os.environ["PYGAME_HIDE_SUPPORT_PROMPT"] = "1"
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from gamesettings import STARTUP_PROBE
+
+RUNS = 7
+
+
+def launch(stage):
+    env = dict(os.environ)
+    env.setdefault("SDL_VIDEODRIVER", "dummy")
+    env.setdefault("SDL_AUDIODRIVER", "dummy")
+    env["PYGAME_HIDE_SUPPORT_PROMPT"] = "1"
+    env[STARTUP_PROBE] = stage
+    start = time.time()
+    output = subprocess.run(
+        [sys.executable, "main.py"], cwd=ROOT, env=env,
+        capture_output=True, text=True, check=True).stdout
+    for line in output.splitlines():
+        if line.startswith(stage + " "):
+            return (float(line.split()[1]) - start) * 1000
+    raise RuntimeError("startup probe did not report: " + output)
+
+
+if __name__ == "__main__":
+    for stage in ("splash", "menu"):
+        samples = [launch(stage) for _ in range(RUNS)]
+        print("launch -> first %-6s frame: median %7.1f ms, min %7.1f ms" % (
+            stage, statistics.median(samples), min(samples)))
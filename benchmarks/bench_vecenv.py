@@ -0,0 +1,23 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from vecenv import VectorEnv
+
+NUM_ENVS = 4096
+STEPS = 500
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    for workers in sorted({1, os.cpu_count() or 1}):
+        env = VectorEnv(NUM_ENVS, workers=workers, seed=0)
+        for _ in range(STEPS):
+            env.step(rng.random((NUM_ENVS, 4)) < 0.2)
+        stats = env.get_stats()
+        env.close()
+        print("%2d workers: %10.0f steps/s, %10.0f steps/s per core" % (
+            workers, stats["steps_per_second"], stats["steps_per_second_per_core"]))
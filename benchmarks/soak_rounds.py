@@ -0,0 +1,65 @@
+import gc
+import os
+import sys
+import tracemalloc
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from inputbuffer import UP
+from menulogic import *
+
+ROUNDS = int(os.environ.get("SOAK_ROUNDS", 300))
+WARMUP_ROUNDS = 20
+MAX_GROWTH_BYTES = 512 * 1024
+
+
+class SoakClock():
+    def tick(self, framerate=0):
+        return MAX_FRAME_TIME * 1000
+
+
+def stack_depth():
+    depth = 0
+    frame = sys._getframe()
+    while frame is not None:
+        depth += 1
+        frame = frame.f_back
+    return depth
+
+
+def play_round(game, depths):
+    game.start_game()
+    game.step_state()
+    while not isinstance(game.get_state(), MenuState):
+        depths.add(stack_depth())
+        game.step_state()
+    game.step_state()
+    depths.add(stack_depth())
+
+
+if __name__ == "__main__":
+    game = Game()
+    game._clock = SoakClock()
+    game.read_input = lambda: (game._input.push(0, UP, "soak", True), 0)[1]
+    game.step_state()
+    depths = set()
+    tracemalloc.start()
+    for _ in range(WARMUP_ROUNDS):
+        play_round(game, depths)
+    gc.collect()
+    baseline = tracemalloc.get_traced_memory()[0]
+    for round in range(1, ROUNDS + 1):
+        play_round(game, depths)
+        if round % 50 == 0:
+            gc.collect()
+            current = tracemalloc.get_traced_memory()[0]
+            print("round %5d: %+9d bytes since warmup, stack depths %s" % (
+                round, current - baseline, sorted(depths)))
+    gc.collect()
+    growth = tracemalloc.get_traced_memory()[0] - baseline
+    if len(depths) > 1 or growth > MAX_GROWTH_BYTES:
+        print("FAIL: memory grew by %d bytes over %d rounds" % (growth, ROUNDS))
+        sys.exit(1)
+    print("OK: %d rounds, %+d bytes, stack depth bounded" % (ROUNDS, growth))
@@ -0,0 +1,137 @@
+import os
+import queue
+import struct
+import threading
+import numpy as np
+import pygame
+from gameobjects import *
+from gamesettings import *
+
+CAPTURE_MAGIC = b"FRGV"
+CAPTURE_HEADER = struct.Struct("<4sHHH")
+
+GRID_EMPTY = 0
+GRID_WATER = 1
+GRID_SUPPORT = 2
+GRID_CAR = 3
+GRID_HOUSE = 4
+GRID_PLAYER = 5
+
+
+# The pixels3d view locks the surface for as long as it is referenced, so it
+# only lives for the duration of fn; fn must not keep it.
+def with_frame_view(surface, fn):
+    pixels = pygame.surfarray.pixels3d(surface)
+    try:
+        return fn(pixels)
+    finally:
+        del pixels
+
+
+def grid_observation(objects, cell=GRID_CELL, out=None):
+    shape = (SCREENHEIGHT // cell, SCREENWIDTH // cell)
+    if out is None:
+        out = np.zeros(shape, dtype=np.uint8)
+    else:
+        out[:] = GRID_EMPTY
+    for object in objects.get_collidables():
+        if isinstance(object, Water):
+            fill_cells(out, object.get_rect(), cell, GRID_WATER)
+    for object in objects.get_movables():
+        if not isinstance(object, Car) and object.is_supporting():
+            fill_cells(out, object.get_rect(), cell, GRID_SUPPORT)
+    for object in objects.get_movables():
+        if isinstance(object, Car):
+            fill_cells(out, object.get_rect(), cell, GRID_CAR)
+    for object in objects.get_collidables():
+        if isinstance(object, House) and object.is_visible():
+            fill_cells(out, object.get_rect(), cell, GRID_HOUSE)
+    fill_cells(out, objects.get_player().get_rect(), cell, GRID_PLAYER)
+    return out
+
+
+def fill_cells(out, rect, cell, value):
+    left = max(rect.left // cell, 0)
+    right = min((rect.right - 1) // cell + 1, out.shape[1])
+    top = max(rect.top // cell, 0)
+    bottom = min((rect.bottom - 1) // cell + 1, out.shape[0])
+    if left < right and top < bottom:
+        out[top:bottom, left:right] = value
+
+
+class FrameExporter():
+    def __init__(self, path, size, fps=FPS, ring_size=CAPTURE_RING_SIZE):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(path, 'wb')
+        self._file.write(CAPTURE_HEADER.pack(CAPTURE_MAGIC, size[0], size[1], fps))
+        self._size = size
+        self._frames = [np.zeros((size[1], size[0]), dtype=np.uint32)
+                        for _ in range(ring_size)]
+        self._shifts = [None] * ring_size
+        self._rgb = np.zeros((size[1], size[0], 3), dtype=np.uint8)
+        self._channel = np.zeros((size[1], size[0]), dtype=np.uint32)
+        self._free = queue.SimpleQueue()
+        self._filled = queue.SimpleQueue()
+        for index in range(ring_size):
+            self._free.put(index)
+        self._written = 0
+        self._dropped = 0
+        self._thread = threading.Thread(target=self.write_frames, daemon=True)
+        self._thread.start()
+
+    def submit(self, surface):
+        if surface.get_size() != self._size or surface.get_bytesize() != 4:
+            raise ValueError("capture needs a 32-bit surface of size %dx%d" % self._size)
+        try:
+            index = self._free.get_nowait()
+        except queue.Empty:
+            self._dropped += 1
+            return False
+        pixels = pygame.surfarray.pixels2d(surface)
+        np.copyto(self._frames[index], pixels.T, casting='unsafe')
+        del pixels
+        self._shifts[index] = surface.get_shifts()[:3]
+        self._filled.put(index)
+        return True
+
+    def write_frames(self):
+        while True:
+            index = self._filled.get()
+            if index is None:
+                return
+            for channel, shift in enumerate(self._shifts[index]):
+                np.right_shift(self._frames[index], shift, out=self._channel)
+                np.bitwise_and(self._channel, 255, out=self._channel)
+                self._rgb[:, :, channel] = self._channel
+            self._free.put(index)
+            self._file.write(self._rgb.data)
+            self._written += 1
+
+    def get_written(self):
+        return self._written
+
+    def get_dropped(self):
+        return self._dropped
+
+    def close(self):
+        if self._file is None:
+            return
+        self._filled.put(None)
+        self._thread.join()
+        self._file.close()
+        self._file = None
+
+
+def read_frames(path):
+    with open(path, 'rb') as f:
+        magic, width, height, fps = CAPTURE_HEADER.unpack(f.read(CAPTURE_HEADER.size))
+        if magic != CAPTURE_MAGIC:
+            raise ValueError("not a frame capture: " + path)
+        frame_size = width * height * 3
+        while True:
+            data = f.read(frame_size)
+            if len(data) < frame_size:
+                return
+            yield np.frombuffer(data, dtype=np.uint8).reshape(height, width, 3)
@@ -1,29 +1,69 @@
+import itertools
+import math
 import pygame
 import random
 from gamesettings import *
+from assetcache import AssetCache
+from hudtext import HudText
+from profiler import NullProfiler
+from spriteatlas import SpriteAtlas
 
 
 class IDrawableObject():
+    __slots__ = ()
+
     def draw(self, screen):
         pass
 
+    def get_blit(self):
+        return None
+
+    def get_dirty_rect(self):
+        return None
+
 
 class ICollidableObject(IDrawableObject):
+    __slots__ = ()
+
     def check_collisions(self, player):
         pass
 
+    def get_rect(self):
+        return self._rect
+
+    def is_stood_on(self):
+        return False
+
+    def is_always_checked(self):
+        return False
+
 
 class IMovableObject(ICollidableObject):
+    __slots__ = ()
+
     def move(self):
         pass
 
+    def get_speed(self):
+        return 0
+
+    def get_wrap_period(self):
+        return None
+
+    def is_supporting(self):
+        return False
+
 
 class PlayerCharacter(IMovableObject):
+    __slots__ = ("_picture", "_rect", "_speed", "_surface_count", "_surface_speed")
+
     def __init__(self, x, y, speed):
-        self._picture = pygame.image.load("./data/frog1_alfa.png")
-        self._surface = pygame.Surface(
-            (self._picture.get_width(), self._picture.get_height()))
-        self._rect = self._surface.get_rect(topleft=(x, y))
+        self._rect = pygame.Rect(0, 0, 0, 0)
+        self.reset(x, y, speed)
+
+    def reset(self, x, y, speed):
+        self._picture = AssetCache().get("./data/frog1_alfa.png")
+        self._rect.update((x, y), self._picture.get_size())
         self._speed = speed
         self._surface_count = 0
         self._surface_speed = 0
@@ -35,6 +75,15 @@ class PlayerCharacter(IMovableObject):
     def get_standing(self):
         return self._surface_count
 
+    def get_speed(self):
+        return self._speed
+
+    def get_surface_speed(self):
+        return self._surface_speed
+
+    def set_position(self, x, y):
+        self._rect.topleft = (x, y)
+
     def go_home(self):
         self._rect.update(288, 670, self._rect.width, self._rect.height)
         # self._rect.update(288, 16, self._rect.width, self._rect.height) #cheat
@@ -48,6 +97,12 @@ class PlayerCharacter(IMovableObject):
     def draw(self, screen):
         screen.blit(self._picture, self._rect)
 
+    def get_blit(self):
+        return (self._picture, self._rect)
+
+    def get_dirty_rect(self):
+        return self._rect
+
     def move(self, arrows):
         if self._rect.right < SCREENWIDTH and self._rect.left > 0:
             self._rect.move_ip(self._surface_speed, 0)
@@ -78,24 +133,38 @@ class PlayerCharacter(IMovableObject):
 
 
 class Car(IMovableObject):
-    def __init__(self, row, offset):
-        self._sprite_name = random.choice(
-            ["./data/car1.png", "./data/car2.png", "./data/car3.png"])
-        self._picture = pygame.image.load(self._sprite_name)
+    __slots__ = ("_sprite_name", "_goesLeft", "_picture", "_rect", "_speed")
+
+    def __init__(self, x, y, speed, sprites, rng=random):
+        self._rect = pygame.Rect(0, 0, 0, 0)
+        self.reset(x, y, speed, sprites, rng)
+
+    def reset(self, x, y, speed, sprites, rng=random):
+        self._sprite_name = rng.choice(sprites)
         self._goesLeft = False
-        if row % 2 == 0:
+        if speed < 0:
             self._goesLeft = True
-        if self._goesLeft:
-            self._picture = pygame.transform.flip(self._picture, True, False)
-        self._surface = pygame.Surface(
-            (self._picture.get_width(), self._picture.get_height()))
-        self._rect = self._surface.get_rect(
-            topleft=(offset*0.5*SCREENWIDTH, 400 + 40 * row))
-        self._speed = 1 + row % 3
+        self._picture = AssetCache().get(self._sprite_name, self._goesLeft)
+        self._rect.update((x, y), self._picture.get_size())
+        self._speed = abs(speed)
 
     def draw(self, surface):
         surface.blit(self._picture, self._rect)
 
+    def get_blit(self):
+        return (self._picture, self._rect)
+
+    def get_dirty_rect(self):
+        return self._rect
+
+    def get_speed(self):
+        if self._goesLeft:
+            return -self._speed
+        return self._speed
+
+    def get_wrap_period(self):
+        return SCREENWIDTH + 80
+
     def move(self):
         if self._goesLeft:
             self._rect.move_ip(-self._speed, 0)
@@ -112,17 +181,37 @@ class Car(IMovableObject):
 
 
 class House(ICollidableObject):
-    def __init__(self, offset):
-        self._picture = pygame.image.load("./data/smolfrog.png")
-        self._surface = pygame.Surface(
-            (self._picture.get_width(), self._picture.get_height()))
-        self._rect = self._surface.get_rect(topleft=(72+128*offset, 28))
+    __slots__ = ("_picture", "_rect", "_visible")
+
+    def __init__(self, x, y, sprite):
+        self._rect = pygame.Rect(0, 0, 0, 0)
+        self.reset(x, y, sprite)
+
+    def reset(self, x, y, sprite):
+        self._picture = AssetCache().get(sprite)
+        self._rect.update((x, y), self._picture.get_size())
         self._visible = False
 
     def draw(self, surface):
         if self._visible == True:
             surface.blit(self._picture, self._rect)
 
+    def get_blit(self):
+        if self._visible == True:
+            return (self._picture, self._rect)
+        return None
+
+    def get_dirty_rect(self):
+        if self._visible == True:
+            return self._rect
+        return None
+
+    def is_visible(self):
+        return self._visible
+
+    def set_visible(self, visible):
+        self._visible = visible
+
     def check_collisions(self, player):
         if self._visible == False:
             if self._rect.colliderect(player.get_rect()):
@@ -132,30 +221,39 @@ class House(ICollidableObject):
 
 
 class WoodenLog(IMovableObject):
-    def __init__(self, size, offset):
-        if size == 4:
-            self._picture = pygame.image.load("./data/log4x1.png")
-            self._surface = pygame.Surface((256, 64))
-            self._rect = self._surface.get_rect(
-                topleft=(1.5*offset*self._picture.get_width(), 192))
-            self._speed = 4
-        elif size == 3:
-            self._picture = pygame.image.load("./data/log3x1.png")
-            self._surface = pygame.Surface((192, 64))
-            self._rect = self._surface.get_rect(
-                topleft=(1.5*offset*self._picture.get_width(), 64))
-            self._speed = 3
-        elif size == 2:
-            self._picture = pygame.image.load("./data/log2x1.png")
-            self._surface = pygame.Surface((128, 64))
-            self._rect = self._surface.get_rect(
-                topleft=(1.5*offset*self._picture.get_width(), 256))
-            self._speed = 1
+    __slots__ = ("_picture", "_rect", "_speed", "_stood_on")
+
+    def __init__(self, x, y, speed, sprite):
+        self._rect = pygame.Rect(0, 0, 0, 0)
+        self.reset(x, y, speed, sprite)
+
+    def reset(self, x, y, speed, sprite):
+        self._picture = AssetCache().get(sprite)
+        self._rect.update((x, y), self._picture.get_size())
+        self._speed = speed
         self._stood_on = False
 
     def draw(self, screen):
         screen.blit(self._picture, self._rect)
 
+    def get_blit(self):
+        return (self._picture, self._rect)
+
+    def get_dirty_rect(self):
+        return self._rect
+
+    def get_speed(self):
+        return self._speed
+
+    def get_wrap_period(self):
+        return SCREENWIDTH + self._rect.width
+
+    def is_supporting(self):
+        return True
+
+    def is_stood_on(self):
+        return self._stood_on
+
     def check_collisions(self, player):
         if self._rect.colliderect(player.get_rect()):
             if self._stood_on == False:
@@ -174,120 +272,137 @@ class WoodenLog(IMovableObject):
             self._rect.move_ip(-SCREENWIDTH - self._rect.width, 0)
 
 
+class ManateePhaseTable():
+    FLOATING = 0
+    SUBMERGING1 = 1
+    SUBMERGING2 = 2
+    SUBMERGED = 3
+
+    def __init__(self, submerge_ticks):
+        bounds = (2 * submerge_ticks, math.ceil(2.5 * submerge_ticks),
+                  3 * submerge_ticks, 4 * submerge_ticks)
+        self._period = bounds[-1]
+        self._support_limit = bounds[self.SUBMERGING2]
+        frames = []
+        for phase in range(self._period):
+            frame = 0
+            while phase >= bounds[frame]:
+                frame += 1
+            frames.append(frame)
+        self._frames = tuple(frames)
+        self._steps = tuple(((phase + 1) % self._period, frames[phase] != self.SUBMERGED)
+                            for phase in range(self._period))
+
+    def get_period(self):
+        return self._period
+
+    def get_support_limit(self):
+        return self._support_limit
+
+    def get_frames(self):
+        return self._frames
+
+    def get_steps(self):
+        return self._steps
+
+    def advance(self, phases):
+        steps = self._steps
+        return [steps[phase][0] for phase in phases]
+
+
+_manatee_tables = {}
+
+
+def get_manatee_table(submerge_ticks):
+    table = _manatee_tables.get(submerge_ticks)
+    if table is None:
+        table = _manatee_tables[submerge_ticks] = ManateePhaseTable(submerge_ticks)
+    return table
+
+
 class Manatees(IMovableObject):
-    def __init__(self, offset):
-        self._pictures = [pygame.image.load("./data/manatees1.png"), pygame.image.load(
-            "./data/manatees2.png"), pygame.image.load("./data/manatees3.png"), pygame.image.load("./data/manatees4.png")]
-        self._picture = self._pictures[0]
-        self._surface = pygame.Surface((256, 64))
-        self._rect = self._surface.get_rect(
-            topleft=(SCREENWIDTH - 2.15*offset*self._picture.get_width(), 128))
-        self._phase_ticks = 0 + 30*offset
-        self._submerged = False
+    __slots__ = ("_pictures", "_rect", "_phase_ticks", "_stood_on", "_speed",
+                 "_submerge_ticks", "_table", "_frames", "_steps")
+
+    def __init__(self, x, y, speed, sprites, width, phase_ticks, submerge_ticks):
+        self._rect = pygame.Rect(0, 0, 0, 0)
+        self.reset(x, y, speed, sprites, width, phase_ticks, submerge_ticks)
+
+    def reset(self, x, y, speed, sprites, width, phase_ticks, submerge_ticks):
+        self._pictures = tuple(AssetCache().get(sprite) for sprite in sprites)
+        self._rect.update(x, y, width, self._pictures[0].get_height())
         self._stood_on = False
-        self._speed = -3.5
-        self._submerge_ticks = 60
-        self.change_state(ManateeStateFloating())
+        self._speed = speed
+        self._submerge_ticks = submerge_ticks
+        self._table = get_manatee_table(submerge_ticks)
+        self._frames = self._table.get_frames()
+        self._steps = self._table.get_steps()
+        self._phase_ticks = phase_ticks % self._table.get_period()
 
     def draw(self, screen):
-        self._state.draw_handle(screen)
+        screen.blit(self._pictures[self._frames[self._phase_ticks]], self._rect)
 
-    def check_collisions(self, player):
-        return self._state.collision_handle(player)
+    def get_blit(self):
+        return (self._pictures[self._frames[self._phase_ticks]], self._rect)
 
-    def move(self):
-        self._rect.move_ip(self._speed, 0)
-        if self._rect.right < 0:
-            self._rect.move_ip(SCREENWIDTH + self._rect.width, 0)
+    def get_dirty_rect(self):
+        return self._rect
 
-    def change_state(self, state):
-        self._state = state
-        self._state.context = self
+    def get_speed(self):
+        return self._speed
 
+    def is_stood_on(self):
+        return self._stood_on
 
-class ManateeState():
-    def draw_handle(self, screen):
-        pass
-    def collision_handle(self, player):
-        pass
+    def is_always_checked(self):
+        return True
 
+    def is_supporting(self):
+        return self._steps[self._phase_ticks][1]
 
-class ManateeStateFloating(ManateeState):
-    def draw_handle(self, screen):
-        screen.blit(self.context._pictures[0], self.context._rect)
-    def collision_handle(self, player):
-        self.context._phase_ticks += 1
-        if self.context._phase_ticks == 2 * self.context._submerge_ticks:
-            self.context.change_state(ManateeStateSubmerging1())
-        if self.context._rect.colliderect(player.get_rect()):
-            if self.context._stood_on == False:
-                player.surface_count_delta(1)
-                player.surface_speed_delta(self.context._speed)
-                self.context._stood_on = True
-        elif self.context._stood_on == True:
-            player.surface_count_delta(-1)
-            player.surface_speed_delta(-self.context._speed)
-            self.context._stood_on = False
-        return 0
+    def get_phase_ticks(self):
+        return self._phase_ticks
 
+    def set_phase_ticks(self, phase_ticks):
+        self._phase_ticks = phase_ticks
 
-class ManateeStateSubmerging1(ManateeState):
-    def draw_handle(self, screen):
-        screen.blit(self.context._pictures[1], self.context._rect)
-    def collision_handle(self, player):
-        self.context._phase_ticks += 1
-        if self.context._phase_ticks == 2.5 * self.context._submerge_ticks:
-            self.context.change_state(ManateeStateSubmerging2())
-        if self.context._rect.colliderect(player.get_rect()):
-            if self.context._stood_on == False:
-                player.surface_count_delta(1)
-                player.surface_speed_delta(self.context._speed)
-                self.context._stood_on = True
-        elif self.context._stood_on == True:
-            player.surface_count_delta(-1)
-            player.surface_speed_delta(-self.context._speed)
-            self.context._stood_on = False
-        return 0
+    def get_submerge_ticks(self):
+        return self._submerge_ticks
 
+    def get_table(self):
+        return self._table
 
-class ManateeStateSubmerging2(ManateeState):
-    def draw_handle(self, screen):
-        screen.blit(self.context._pictures[2], self.context._rect)
-    def collision_handle(self, player):
-        self.context._phase_ticks += 1
-        if self.context._phase_ticks == 3 * self.context._submerge_ticks:
-            self.context.change_state(ManateeStateSubmerged())
-        if self.context._rect.colliderect(player.get_rect()):
-            if self.context._stood_on == False:
-                player.surface_count_delta(1)
-                player.surface_speed_delta(self.context._speed)
-                self.context._stood_on = True
-        elif self.context._stood_on == True:
-            player.surface_count_delta(-1)
-            player.surface_speed_delta(-self.context._speed)
-            self.context._stood_on = False
+    def check_collisions(self, player):
+        self._phase_ticks, supporting = self._steps[self._phase_ticks]
+        standing = supporting and self._rect.colliderect(player.get_rect())
+        if standing != self._stood_on:
+            self.set_stood_on(player, standing)
         return 0
 
-
-class ManateeStateSubmerged(ManateeState):
-    def draw_handle(self, screen):
-        screen.blit(self.context._pictures[3], self.context._rect)
-    def collision_handle(self, player):
-        self.context._phase_ticks += 1
-        if self.context._phase_ticks == 4 * self.context._submerge_ticks:
-            self.context._phase_ticks = 0
-            self.context.change_state(ManateeStateFloating())
-        if self.context._stood_on == True:
+    def set_stood_on(self, player, standing):
+        if standing:
+            player.surface_count_delta(1)
+            player.surface_speed_delta(self._speed)
+        else:
             player.surface_count_delta(-1)
-            player.surface_speed_delta(-self.context._speed)
-            self.context._stood_on = False
-        return 0
+            player.surface_speed_delta(-self._speed)
+        self._stood_on = standing
+
+    def move(self):
+        self._rect.move_ip(self._speed, 0)
+        if self._rect.right < 0:
+            self._rect.move_ip(SCREENWIDTH + self._rect.width, 0)
 
 
 class Water(ICollidableObject):
-    def __init__(self):
-        self._surface = pygame.Surface((576, 196))
-        self._rect = self._surface.get_rect(topleft=(0, 104))
+    __slots__ = ("_rect",)
+
+    def __init__(self, x, y, width, height):
+        self._rect = pygame.Rect(0, 0, 0, 0)
+        self.reset(x, y, width, height)
+
+    def reset(self, x, y, width, height):
+        self._rect.update(x, y, width, height)
 
     def check_collisions(self, player):
         if self._rect.colliderect(player.get_rect()) and player.get_standing() == 0:
@@ -300,64 +415,393 @@ class Water(ICollidableObject):
 
 
 class Background(IDrawableObject):
-    def __init__(self):
-        self._picture = pygame.image.load("./data/froggerbg.png")
+    __slots__ = ("_picture",)
+
+    def __init__(self, sprite="./data/froggerbg.png"):
+        self.reset(sprite)
+
+    def reset(self, sprite="./data/froggerbg.png"):
+        self._picture = AssetCache().get(sprite)
 
     def draw(self, screen):
         screen.blit(self._picture, (0, 0))
 
+    def get_blit(self):
+        return (self._picture, (0, 0))
+
+    def restore(self, screen, rect):
+        screen.blit(self._picture, rect, rect)
+
+
+class ObjectPool():
+    def __init__(self):
+        self._free = {}
+        self._created = 0
+        self._reused = 0
+
+    def acquire(self, cls, *args):
+        free = self._free.get(cls)
+        if free:
+            object = free.pop()
+            object.reset(*args)
+            self._reused += 1
+            return object
+        self._created += 1
+        return cls(*args)
+
+    def release(self, object):
+        self._free.setdefault(type(object), []).append(object)
+
+    def get_stats(self):
+        return {"created": self._created, "reused": self._reused,
+                "free": sum(len(free) for free in self._free.values())}
+
+
+class LaneIndex():
+    def __init__(self, band_height=LANE_BAND_HEIGHT):
+        self._band_height = band_height
+        self._bands = {}
+        self._object_bands = {}
+        self._order = {}
+        self._always = set()
+        self._supporting = set()
+
+    def add(self, object, order):
+        self._order[object] = order
+        if object.is_always_checked():
+            self._always.add(object)
+        self.update(object)
+
+    def update(self, object):
+        rect = object.get_rect()
+        bands = range(rect.top // self._band_height,
+                      (rect.bottom - 1) // self._band_height + 1)
+        old_bands = self._object_bands.get(object)
+        if old_bands == bands:
+            return
+        if old_bands is not None:
+            for band in old_bands:
+                self._bands[band].remove(object)
+        for band in bands:
+            self._bands.setdefault(band, []).append(object)
+        self._object_bands[object] = bands
+
+    def track(self, object):
+        if object.is_stood_on():
+            self._supporting.add(object)
+        else:
+            self._supporting.discard(object)
+
+    def get_candidates(self, rect):
+        candidates = self._always | self._supporting
+        for band in range(rect.top // self._band_height,
+                          (rect.bottom - 1) // self._band_height + 1):
+            candidates.update(self._bands.get(band, ()))
+        return sorted(candidates, key=self._order.__getitem__)
+
+
+def fits_lane_strip(objects, period):
+    rects = [object.get_rect() for object in objects]
+    if any(rect.y != rects[0].y or rect.height != rects[0].height for rect in rects):
+        return False
+    if period < SCREENWIDTH + max(rect.width for rect in rects):
+        return False
+    colorkeys = set()
+    for object in objects:
+        picture = object.get_blit()[0]
+        if picture.get_flags() & pygame.SRCALPHA:
+            return False
+        colorkeys.add(picture.get_colorkey())
+    return len(colorkeys) == 1 and None not in colorkeys
+
+
+class LaneStrip():
+    def __init__(self, objects, period):
+        self._objects = objects
+        self._period = period
+        rects = [object.get_rect() for object in objects]
+        self._y = rects[0].y
+        self._origins = [rect.x for rect in rects]
+        self._area = pygame.Rect(0, 0, SCREENWIDTH, rects[0].height)
+        colorkey = objects[0].get_blit()[0].get_colorkey()
+        self._surface = pygame.Surface((period + SCREENWIDTH, rects[0].height)).convert()
+        self._surface.fill(colorkey)
+        for object, rect in zip(objects, rects):
+            for copy in (-1, 0, 1):
+                self._surface.blit(object.get_blit()[0], (rect.x % period + copy * period, 0))
+        self._surface.set_colorkey(colorkey, pygame.RLEACCEL)
+
+    def add_blit(self, blits):
+        shift = None
+        for object, origin in zip(self._objects, self._origins):
+            rect = object.get_rect()
+            if rect.y != self._y or rect.x + self._period < SCREENWIDTH or rect.right > self._period:
+                return False
+            offset = (rect.x - origin) % self._period
+            if shift is None:
+                shift = offset
+            elif offset != shift:
+                return False
+        self._area.x = -shift % self._period
+        blits.append((self._surface, (0, self._y), self._area))
+        return True
+
 
 class ScreenObjects():
-    def __init__(self, screen, font):
+    def __init__(self, screen, font, dirty_rects=DIRTY_RECTS, lane_strips=LANE_STRIPS):
         self._drawable_list = []
         self._movable_list = []
         self._collidable_list = []
         self._screen = screen
         self._font = font
+        self._hud_text = HudText(font, (255, 255, 255))
         self._player = None
+        self._background = None
+        self._lane_index = LaneIndex()
+        self._profiler = NullProfiler()
+        self._dirty_rects = dirty_rects
+        self._lane_strips = lane_strips
+        self._lanes = None
+        self._draw_calls = 0
+        self._last_blits = {}
+        self._positions = []
+        self._dirty_list = None
+        self._pixels_pushed = 0
         self._lives = 4
         self._goals = 0
         self._score = 5000
 
     def add_drawable(self, object):
         self._drawable_list.append(object)
+        self._lanes = None
 
     def add_collidable(self, object):
+        self._lane_index.add(object, (0, len(self._collidable_list)))
         self._collidable_list.append(object)
+        self._lanes = None
 
     def add_movable(self, object):
+        self._lane_index.add(object, (1, len(self._movable_list)))
         self._movable_list.append(object)
+        self._lanes = None
 
     def set_player(self, player):
         self._player = player
 
-    def draw_objects(self):
-        for object in [*self._drawable_list, *self._movable_list, *self._collidable_list]:
-            object.draw(self._screen)
-        self._player.draw(self._screen)
+    def get_player(self):
+        return self._player
+
+    def release_objects(self, pool):
+        for object in [*self._drawable_list, *self._collidable_list, *self._movable_list]:
+            pool.release(object)
+        self._drawable_list = []
+        self._collidable_list = []
+        self._movable_list = []
+        self._lane_index = LaneIndex()
+        self._lanes = None
+        self._player = None
+        self._background = None
+
+    def set_profiler(self, profiler):
+        self._profiler = profiler
+
+    def request_full_redraw(self):
+        self._last_blits = {}
+
+    def get_collidables(self):
+        return self._collidable_list
+
+    def get_movables(self):
+        return self._movable_list
+
+    def get_lives(self):
+        return self._lives
+
+    def set_lives(self, lives):
+        self._lives = lives
+
+    def get_goals(self):
+        return self._goals
+
+    def get_score(self):
+        return self._score
+
+    def set_score(self, score):
+        self._score = score
+
+    def set_background(self, background):
+        self._background = background
+        self.add_drawable(background)
+
+    def get_dirty_rects(self):
+        return self._dirty_list
+
+    def get_pixels_pushed(self):
+        return self._pixels_pushed
+
+    def get_draw_calls(self):
+        return self._draw_calls
+
+    def set_lane_strips(self, lane_strips):
+        self._lane_strips = lane_strips
+        self._lanes = None
+
+    def draw_to(self, surface):
+        screen = self._screen
+        self._screen = surface
+        self.draw_blits(True)
         self.draw_score()
+        self._screen = screen
+
+    def draw_objects(self, alpha=1.0):
+        offsets = self.offset_objects(alpha)
+        if self._dirty_rects and self._last_blits:
+            self.draw_dirty_objects()
+        else:
+            self.draw_all_objects()
+        for rect, dx, dy in offsets:
+            rect.move_ip(-dx, -dy)
+
+    def offset_objects(self, alpha):
+        offsets = []
+        if alpha >= 1.0 or not self._positions:
+            return offsets
+        objects = [*self._movable_list, self._player]
+        for object, (x, y) in zip(objects, self._positions):
+            rect = object.get_rect()
+            if abs(x - rect.x) > MAX_INTERPOLATION or abs(y - rect.y) > MAX_INTERPOLATION:
+                continue
+            dx = round((x - rect.x) * (1.0 - alpha))
+            dy = round((y - rect.y) * (1.0 - alpha))
+            if dx != 0 or dy != 0:
+                rect.move_ip(dx, dy)
+                offsets.append((rect, dx, dy))
+        return offsets
+
+    def build_lanes(self):
+        if not SpriteAtlas().is_built():
+            SpriteAtlas().build()
+        strips = self._lane_strips and pygame.display.get_surface() is not None
+        self._lanes = []
+        key = None
+        for object in self._movable_list:
+            rect = object.get_rect()
+            object_key = (type(object), rect.y, rect.height,
+                          object.get_speed(), object.get_wrap_period())
+            if object_key != key:
+                self._lanes.append([])
+                key = object_key
+            self._lanes[-1].append(object)
+        for index, objects in enumerate(self._lanes):
+            period = objects[0].get_wrap_period()
+            strip = None
+            if strips and period is not None and fits_lane_strip(objects, period):
+                strip = LaneStrip(objects, period)
+            self._lanes[index] = (objects, strip)
+
+    def collect_blits(self, background):
+        if self._lanes is None:
+            self.build_lanes()
+        blits = []
+        for object in self._drawable_list:
+            if object is not self._player and (background or object is not self._background):
+                self.add_blit(blits, object)
+        for objects, strip in self._lanes:
+            if strip is None or not strip.add_blit(blits):
+                for object in objects:
+                    self.add_blit(blits, object)
+        for object in self._collidable_list:
+            self.add_blit(blits, object)
+        self.add_blit(blits, self._player)
+        return blits
+
+    def add_blit(self, blits, object):
+        blit = object.get_blit()
+        if blit is not None:
+            blits.append(SpriteAtlas().get_blit(*blit))
+
+    def draw_blits(self, background):
+        blits = self.collect_blits(background)
+        self._screen.blits(blits, False)
+        self._draw_calls = len(blits)
+
+    def draw_all_objects(self):
+        self.draw_blits(True)
+        self._profiler.begin("score")
+        self.draw_score()
+        self._profiler.end("score")
+        if self._dirty_rects:
+            self.store_blits()
+        self._dirty_list = None
+        self._pixels_pushed = SCREENWIDTH * SCREENHEIGHT
+
+    def draw_dirty_objects(self):
+        old_blits = self._last_blits
+        self.store_blits()
+        dirty = []
+        for picture, rect in self._last_blits.values():
+            self._background.restore(self._screen, rect)
+        for object, blit in old_blits.items():
+            if self._last_blits.get(object) != blit:
+                self._background.restore(self._screen, blit[1])
+                dirty.append(blit[1])
+        for object, blit in self._last_blits.items():
+            if old_blits.get(object) != blit:
+                dirty.append(blit[1])
+        dirty = self.merge_rects(dirty)
+        self.draw_blits(False)
+        self._profiler.begin("score")
+        self.draw_score()
+        self._profiler.end("score")
+        dirty.append(pygame.Rect(0, 704, SCREENWIDTH, 64))
+        self._dirty_list = dirty
+        self._pixels_pushed = 0
+        for rect in dirty:
+            self._pixels_pushed += rect.width * rect.height
+
+    def store_blits(self):
+        screen_rect = self._screen.get_rect()
+        self._last_blits = {}
+        for object in itertools.chain(self._drawable_list, self._movable_list, self._collidable_list):
+            rect = object.get_dirty_rect()
+            if rect is not None:
+                self._last_blits[object] = (object.get_blit()[0], rect.clip(screen_rect))
+
+    def merge_rects(self, rects):
+        merged = []
+        for rect in rects:
+            if rect.width == 0 or rect.height == 0:
+                continue
+            index = rect.collidelist(merged)
+            while index != -1:
+                rect = rect.union(merged.pop(index))
+                index = rect.collidelist(merged)
+            merged.append(rect)
+        return merged
 
     def draw_score(self):
         pygame.draw.rect(self._screen, (0, 0, 0), (0, 704, SCREENWIDTH, 64), 0)
-        text_surface, rect = self._font.render(
-            "Lives amount: " + str(self._lives), (255, 255, 255))
-        rect = text_surface.get_rect(midtop = (SCREENWIDTH/3, 725))
-        self._screen.blit(text_surface, rect)
-
-        text_surface, rect = self._font.render(
-            "Score: " + str(self._score), (255, 255, 255))
-        rect = text_surface.get_rect(midtop = (2*SCREENWIDTH/3, 725))
-        self._screen.blit(text_surface, rect)
+        self._hud_text.draw_line(
+            self._screen, "Lives amount: " + str(self._lives), (SCREENWIDTH/3, 725))
+        self._hud_text.draw_counter(
+            self._screen, "Score: ", self._score, (2*SCREENWIDTH/3, 725))
 
+    def update_score(self):
         self._score -= 1
 
     def move_objects(self):
+        self.store_positions()
         for object in self._movable_list:
             object.move()
 
+    def store_positions(self):
+        self._positions = [object.get_rect().topleft for object in self._movable_list]
+        self._positions.append(self._player.get_rect().topleft)
+
     def collide_objects(self):
-        for object in [*self._collidable_list, *self._movable_list]:
+        for object in self._lane_index.get_candidates(self._player.get_rect()):
             has_collided = object.check_collisions(self._player)
+            self._lane_index.track(object)
             if has_collided != 0:
                 if has_collided == -1:
                     return self.damage_player()
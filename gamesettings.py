@@ -1,3 +1,42 @@
+import pygame
+
 SCREENWIDTH = 576 
 SCREENHEIGHT = 768
-FPS = 60
\ No newline at end of file
+FPS = 60
+DIRTY_RECTS = False
+LANE_BAND_HEIGHT = 32
+RENDER_FPS = 120
+TIMESTEP = 1 / FPS
+MAX_FRAME_TIME = 0.25
+MAX_INTERPOLATION = 16
+PROFILER_WINDOW = 600
+PROFILER_OVERLAY_REFRESH = 15
+PROFILER_OVERLAY_KEY = pygame.K_F3
+PROFILER_EXPORT_KEY = pygame.K_F4
+PROFILE_DIR = "./profiles"
+REPLAY_BUFFER_SIZE = 4096
+REPLAY_FLUSH_TICKS = 600
+LAST_REPLAY = "./replays/last.frg"
+SCOREBOARD_SIZE = 5
+SCORE_DATABASE = "./highscores/highscores.db"
+SCORE_STORE_TIMEOUT = 10.0
+LEGACY_HIGHSCORES = "./highscores/highscores.pkl"
+SCORE_FLUSH_DELAY = 0.5
+ASSET_DIR = "./data"
+SPLASH_IMAGE = "./data/endscreen.png"
+STARTUP_PROBE = "FROGGER_STARTUP_PROBE"
+DEFAULT_LEVEL = "./levels/classic.json"
+INPUT_BUFFER_SIZE = 256
+KEY_BINDINGS = {"up": (pygame.K_UP,), "down": (pygame.K_DOWN,),
+                "left": (pygame.K_LEFT,), "right": (pygame.K_RIGHT,)}
+JOYSTICK_BUTTON_BINDINGS = {}
+JOYSTICK_AXIS_THRESHOLD = 0.5
+ATLAS_WIDTH = 1024
+ATLAS_MAX_SPRITE = 256
+LANE_STRIPS = True
+GRID_CELL = 32
+CAPTURE_RING_SIZE = 8
+CAPTURE_ENV = "FROGGER_CAPTURE"
+SPECTATOR_ENV = "FROGGER_SPECTATE"
+SPECTATOR_HOST = "127.0.0.1"
+SPECTATOR_MAX_BUFFER = 64 * 1024
\ No newline at end of file
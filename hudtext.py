@@ -0,0 +1,42 @@
+class HudText():
+    def __init__(self, font, color):
+        self._font = font
+        self._color = color
+        self._lines = {}
+        self._glyphs = {}
+
+    def draw_line(self, screen, text, midtop):
+        surface = self._lines.get(text)
+        if surface is None:
+            surface = self._font.render(text, self._color)[0]
+            self._lines[text] = surface
+        screen.blit(surface, surface.get_rect(midtop=midtop))
+
+    def draw_counter(self, screen, label, value, midtop):
+        pieces = [self.get_glyph(label)]
+        for char in str(value):
+            pieces.append(self.get_glyph(char))
+        ascent = 0
+        width = 0
+        for surface, bearing, top, advance in pieces:
+            ascent = max(ascent, top)
+            width += advance
+        surface, bearing, top, advance = pieces[-1]
+        width += bearing + surface.get_width() - advance - pieces[0][1]
+        x = int(midtop[0]) - width // 2 - pieces[0][1]
+        pen = 0
+        for surface, bearing, top, advance in pieces:
+            screen.blit(surface, (x + pen + bearing,
+                                  midtop[1] + ascent - top))
+            pen += advance
+
+    def get_glyph(self, text):
+        glyph = self._glyphs.get(text)
+        if glyph is None:
+            surface, rect = self._font.render(text, self._color)
+            advance = 0
+            for metrics in self._font.get_metrics(text):
+                advance += int(metrics[4])
+            glyph = (surface, rect.x, rect.y, advance)
+            self._glyphs[text] = glyph
+        return glyph
@@ -0,0 +1,130 @@
+import pygame
+from gamesettings import *
+
+ACTIONS = ("up", "down", "left", "right")
+UP, DOWN, LEFT, RIGHT = range(len(ACTIONS))
+
+
+class ActionMap():
+    def __init__(self, key_bindings=KEY_BINDINGS, button_bindings=JOYSTICK_BUTTON_BINDINGS,
+                 axis_threshold=JOYSTICK_AXIS_THRESHOLD):
+        self._keys = {}
+        self._buttons = {}
+        for action, keys in key_bindings.items():
+            for key in keys:
+                self.bind_key(key, action)
+        for action, buttons in button_bindings.items():
+            for button in buttons:
+                self.bind_button(button, action)
+        self._axis_threshold = axis_threshold
+        self._joysticks = {}
+
+    def bind_key(self, key, action):
+        self._keys[key] = ACTIONS.index(action)
+
+    def bind_button(self, button, action):
+        self._buttons[button] = ACTIONS.index(action)
+
+    def get_keys(self):
+        return self._keys
+
+    def translate(self, event):
+        if event.type == pygame.KEYDOWN or event.type == pygame.KEYUP:
+            action = self._keys.get(event.key)
+            if action is None:
+                return ()
+            return ((action, ("key", event.key), event.type == pygame.KEYDOWN),)
+        if event.type == pygame.JOYBUTTONDOWN or event.type == pygame.JOYBUTTONUP:
+            action = self._buttons.get(event.button)
+            if action is None:
+                return ()
+            source = ("button", event.instance_id, event.button)
+            return ((action, source, event.type == pygame.JOYBUTTONDOWN),)
+        if event.type == pygame.JOYHATMOTION:
+            x, y = event.value
+            source = ("hat", event.instance_id, event.hat)
+            return ((LEFT, source, x < 0), (RIGHT, source, x > 0),
+                    (UP, source, y > 0), (DOWN, source, y < 0))
+        if event.type == pygame.JOYAXISMOTION and event.axis < 2:
+            source = ("axis", event.instance_id, event.axis)
+            low, high = (LEFT, RIGHT) if event.axis == 0 else (UP, DOWN)
+            return ((low, source, event.value < -self._axis_threshold),
+                    (high, source, event.value > self._axis_threshold))
+        if event.type == pygame.JOYDEVICEADDED:
+            joystick = pygame.joystick.Joystick(event.device_index)
+            self._joysticks[joystick.get_instance_id()] = joystick
+        elif event.type == pygame.JOYDEVICEREMOVED:
+            self._joysticks.pop(event.instance_id, None)
+        return ()
+
+
+class InputBuffer():
+    def __init__(self, action_map=None, size=INPUT_BUFFER_SIZE):
+        if action_map is None:
+            action_map = ActionMap()
+        self._action_map = action_map
+        self._times = [0] * size
+        self._actions = [0] * size
+        self._sources = [None] * size
+        self._pressed = [False] * size
+        self._head = 0
+        self._count = 0
+        self._overflows = 0
+        self._held = [set() for action in ACTIONS]
+        self._latched = [False] * len(ACTIONS)
+
+    def get_action_map(self):
+        return self._action_map
+
+    def get_pending(self):
+        return self._count
+
+    def get_overflows(self):
+        return self._overflows
+
+    def clear(self, keys=None):
+        self._head = 0
+        self._count = 0
+        for held in self._held:
+            held.clear()
+        self._latched = [False] * len(ACTIONS)
+        if keys is not None:
+            for key, action in self._action_map.get_keys().items():
+                if keys[key]:
+                    self._held[action].add(("key", key))
+
+    def push_event(self, event, time):
+        for action, source, pressed in self._action_map.translate(event):
+            self.push(time, action, source, pressed)
+
+    def push(self, time, action, source, pressed):
+        size = len(self._times)
+        if self._count == size:
+            self.apply_oldest()
+            self._overflows += 1
+        index = (self._head + self._count) % size
+        self._times[index] = time
+        self._actions[index] = action
+        self._sources[index] = source
+        self._pressed[index] = pressed
+        self._count += 1
+
+    def apply_oldest(self):
+        index = self._head
+        held = self._held[self._actions[index]]
+        if self._pressed[index]:
+            if self._sources[index] not in held:
+                self._latched[self._actions[index]] = True
+            held.add(self._sources[index])
+        else:
+            held.discard(self._sources[index])
+        self._sources[index] = None
+        self._head = (index + 1) % len(self._times)
+        self._count -= 1
+
+    def consume(self, until=None):
+        while self._count and (until is None or self._times[self._head] <= until):
+            self.apply_oldest()
+        arrows = [bool(held) or latched for held, latched in zip(self._held, self._latched)]
+        self._latched = [False] * len(ACTIONS)
+        return arrows
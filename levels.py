@@ -0,0 +1,122 @@
+import json
+import os
+from gameobjects import *
+from gamesettings import *
+
+LANE_KINDS = ("car", "log", "manatees")
+
+
+class Level():
+    def __init__(self, data):
+        self._name = data.get("name", "")
+        self._background = data.get("background", "./data/froggerbg.png")
+        player = data["player"]
+        self._player = (player["x"], player["y"], player["speed"])
+        water = data["water"]
+        self._water = (water["x"], water["y"], water["width"], water["height"])
+        houses = data["houses"]
+        self._house_sprite = houses["sprite"]
+        self._houses = tuple((x, houses["y"]) for x in houses["x"])
+        self.compile_lanes(data["lanes"])
+
+    def compile_lanes(self, lanes):
+        kinds = []
+        y = []
+        speeds = []
+        sprites = []
+        widths = []
+        submerge_ticks = []
+        starts = [0]
+        x = []
+        phases = []
+        flipped = set()
+        for lane in lanes:
+            kind = lane["kind"]
+            if kind not in LANE_KINDS:
+                raise ValueError("unknown lane kind: " + str(kind))
+            kinds.append(LANE_KINDS.index(kind))
+            y.append(lane["y"])
+            speeds.append(lane["speed"])
+            if kind == "log":
+                sprites.append((lane["sprite"],))
+            else:
+                sprites.append(tuple(lane["sprites"]))
+            if kind == "car" and lane["speed"] < 0:
+                flipped.update(lane["sprites"])
+            widths.append(lane.get("width", 0))
+            submerge_ticks.append(lane.get("submerge_ticks", 0))
+            lane_phases = lane.get("phase", [0] * len(lane["x"]))
+            if len(lane_phases) != len(lane["x"]):
+                raise ValueError("lane phases must match its objects")
+            x.extend(lane["x"])
+            phases.extend(lane_phases)
+            starts.append(len(x))
+        self._kinds = tuple(kinds)
+        self._y = tuple(y)
+        self._speeds = tuple(speeds)
+        self._sprites = tuple(sprites)
+        self._widths = tuple(widths)
+        self._submerge_ticks = tuple(submerge_ticks)
+        self._starts = tuple(starts)
+        self._x = tuple(x)
+        self._phases = tuple(phases)
+        self._flipped = tuple(sorted(flipped))
+
+    def get_name(self):
+        return self._name
+
+    def get_lane_count(self):
+        return len(self._kinds)
+
+    def get_object_count(self):
+        return len(self._x)
+
+    def get_flipped_sprites(self):
+        return self._flipped
+
+    def get_lane(self, lane):
+        return (LANE_KINDS[self._kinds[lane]], self._y[lane], self._speeds[lane],
+                self._x[self._starts[lane]:self._starts[lane + 1]])
+
+    def create_player(self, pool):
+        return pool.acquire(PlayerCharacter, *self._player)
+
+    def populate(self, objects_list, player, rng, pool):
+        objects_list.set_player(player)
+        objects_list.add_drawable(player)
+        objects_list.set_background(pool.acquire(Background, self._background))
+        objects_list.add_collidable(pool.acquire(Water, *self._water))
+        for x, y in self._houses:
+            objects_list.add_collidable(pool.acquire(House, x, y, self._house_sprite))
+        for lane, kind in enumerate(self._kinds):
+            y = self._y[lane]
+            speed = self._speeds[lane]
+            sprites = self._sprites[lane]
+            for index in range(self._starts[lane], self._starts[lane + 1]):
+                if kind == 0:
+                    movable = pool.acquire(Car, self._x[index], y, speed, sprites, rng)
+                elif kind == 1:
+                    movable = pool.acquire(WoodenLog, self._x[index], y, speed, sprites[0])
+                else:
+                    movable = pool.acquire(Manatees, self._x[index], y, speed, sprites,
+                                           self._widths[lane], self._phases[index],
+                                           self._submerge_ticks[lane])
+                objects_list.add_movable(movable)
+
+
+def compile_level(data):
+    return Level(data)
+
+
+_compiled = {}
+
+
+def load_level(path=DEFAULT_LEVEL):
+    mtime = os.stat(path).st_mtime_ns
+    cached = _compiled.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    with open(path) as f:
+        level = compile_level(json.load(f))
+    _compiled[path] = (mtime, level)
+    return level
@@ -1,4 +1,13 @@
+from startup import *
+
+show_splash()
+probe("splash")
+start_preloading()
+
 from menulogic import *
 
 class main(metaclass = Singleton):
-    game = Game()
\ No newline at end of file
+    game = Game()
+    game.step_state()
+    probe("menu")
+    game.run()
\ No newline at end of file
@@ -2,19 +2,20 @@ import pygame
 import pygame.freetype
 import pygame_menu
 import sys
+import os
+import time
 import pickle
+import random
 from gameobjects import *
 from gamesettings import *
-
-
-class Singleton(type):
-    _instances = {}
-
-    def __call__(cls, *args, **kwargs):
-        if cls not in cls._instances:
-            cls._instances[cls] = super(
-                Singleton, cls).__call__(*args, **kwargs)
-        return cls._instances[cls]
+from capture import FrameExporter
+from inputbuffer import InputBuffer
+from profiler import FrameProfiler
+from replay import SessionRecorder, SessionReplay, validate_session
+from scorestore import ScoreStore, ScoreboardService
+from simulation import Simulation
+from spectator import SpectatorServer, parse_address
+from singleton import Singleton
 
 
 class Highscore():
@@ -28,6 +29,9 @@ class Highscore():
     def get_score(self):
         return self._score
 
+    def get_name(self):
+        return self._name
+
     def __lt__(self, otherscore):
         return self._score < otherscore.get_score()
 
@@ -36,39 +40,83 @@ class MenuFactory():
     def __init__(self, game):
         self._game = game
         self._theme = self.create_theme()
+        self._menus = {}
+        self._widgets = {}
+
+    def get_menu(self, name, create):
+        menu = self._menus.get(name)
+        if menu is None:
+            menu, self._widgets[name] = create()
+            self._menus[name] = menu
+        return menu
+
+    def get_start_menu(self):
+        return self.get_menu("start", self.create_start_menu)
+
+    def get_end_menu(self, lastscore, new_record):
+        menu = self.get_menu("end", self.create_end_menu)
+        widgets = self._widgets["end"]
+        widgets["score"].set_title("Your score: " + str(lastscore))
+        for widget in (widgets["record"], widgets["save"]):
+            if new_record:
+                widget.show()
+            else:
+                widget.hide()
+        return menu
+
+    def get_save_menu(self):
+        menu = self.get_menu("save", self.create_save_menu)
+        self._widgets["save"]["name"].set_value("")
+        return menu
+
+    def get_scoreboard_menu(self, scorelist):
+        menu = self.get_menu("scoreboard", self.create_scoreboard_menu)
+        for label, highscore in zip(self._widgets["scoreboard"]["highscores"], scorelist):
+            label.set_title(str(highscore))
+        return menu
 
     def create_start_menu(self):
         menu = pygame_menu.Menu(
             '', SCREENWIDTH, SCREENHEIGHT, theme=self._theme)
         menu.add.button('Play', self._game.start_game)
         menu.add.button('Highscores', self._game.scoreboard_menu)
-        menu.add.button('Exit', pygame_menu.events.EXIT)
-        return menu
+        menu.add.button('Exit', self._game.exit_game)
+        return menu, {}
 
-    def create_end_menu(self, lastscore):
+    def create_end_menu(self):
         menu = pygame_menu.Menu(
             '', SCREENWIDTH, SCREENHEIGHT, theme=self._theme)
         menu.add.button('Play again', self._game.start_game)
+        menu.add.button('Watch replay', self._game.watch_replay)
         menu.add.button('Highscores', self._game.scoreboard_menu)
-        menu.add.button('Exit', pygame_menu.events.EXIT)
-        menu.add.label("Your score: " + str(lastscore), font_color=(255, 255, 255))
-        return menu
+        menu.add.button('Exit', self._game.exit_game)
+        widgets = {}
+        widgets["score"] = menu.add.label(
+            "Your score: 0", font_color=(255, 255, 255))
+        widgets["record"] = menu.add.label(
+            "A new record!", font_color=(255, 255, 255))
+        widgets["save"] = menu.add.button(
+            'Save record', self._game.save_record_screen)
+        return menu, widgets
 
-    def create_save_menu(self, scorelist):
+    def create_save_menu(self):
         menu = pygame_menu.Menu('', SCREENWIDTH, SCREENHEIGHT,
-                                theme=self._theme, onclose=pygame_menu.events.BACK)
-        menu.add.text_input(
-            'Name: ', onreturn=self._game.save_record, scoreboard=scorelist)
+                                theme=self._theme, onclose=self._game.go_back)
+        widgets = {}
+        widgets["name"] = menu.add.text_input(
+            'Name: ', onreturn=self._game.save_record)
         menu.add.button('Return', menu.close)
-        return menu
+        return menu, widgets
 
-    def create_scoreboard_menu(self, scorelist):
+    def create_scoreboard_menu(self):
         menu = pygame_menu.Menu('', SCREENWIDTH, SCREENHEIGHT,
-                                theme=self._theme, onclose=pygame_menu.events.BACK)
-        for highscore in scorelist:
-            menu.add.label(highscore, font_color=(255, 255, 255))
+                                theme=self._theme, onclose=self._game.go_back)
+        widgets = {"highscores": []}
+        for _ in range(SCOREBOARD_SIZE):
+            widgets["highscores"].append(
+                menu.add.label("0 None", font_color=(255, 255, 255)))
         menu.add.button('Return', menu.close)
-        return menu
+        return menu, widgets
 
     def create_theme(self):
         mytheme = pygame_menu.Theme()
@@ -82,119 +130,284 @@ class MenuFactory():
 
 
 class ScoreboardCaretaker():
-    def __init__(self, game):
+    def __init__(self, game, path=SCORE_DATABASE):
         self._game = game
-    
-    def restore(self):
+        self._store = ScoreStore(path)
+        if self._store.count() == 0:
+            self.import_legacy()
+        self._service = ScoreboardService(self._store)
+
+    def import_legacy(self):
         try:
-            with open('./highscores/highscores.pkl', 'rb') as f:
+            with open(LEGACY_HIGHSCORES, 'rb') as f:
                 scoreboard = pickle.load(f)
-        except FileNotFoundError:
-            scoreboard = []
-            for _ in range(5):
-                scoreboard.append(Highscore(0, "None"))
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+            return
+        entries = []
+        for highscore in scoreboard:
+            if highscore.get_score() != 0 or highscore.get_name() != "None":
+                entries.append((highscore.get_score(), highscore.get_name()))
+        if entries:
+            self._store.add_many(entries)
+
+    def restore(self, size=SCOREBOARD_SIZE):
+        scoreboard = []
+        for score, name in self._service.top(size):
+            scoreboard.append(Highscore(score, name))
+        while len(scoreboard) < size:
+            scoreboard.append(Highscore(0, "None"))
         return scoreboard
 
-    def create(self, scoreboard):
-        with open('./highscores/highscores.pkl', 'wb') as f:
-            pickle.dump(scoreboard, f)
+    def create(self, highscore):
+        self._service.add(highscore.get_score(), highscore.get_name())
+
+    def flush(self):
+        self._service.flush()
+
+    def close(self):
+        self._service.close()
+
+
+class GameState():
+    def enter(self):
+        pass
+
+    def tick(self):
+        pass
+
+    def get_back_state(self):
+        return None
+
+
+class MenuState(GameState):
+    def __init__(self, menu, back_state=None):
+        self._menu = menu
+        self._back_state = back_state
+
+    def enter(self):
+        self._menu.enable()
+
+    def tick(self):
+        events = self.context.poll_events()
+        self._menu.update(events)
+        if self.context._next_state is None and self._menu.is_enabled():
+            self._menu.draw(self.context._screen)
+            pygame.display.flip()
+        self.context._clock.tick(FPS)
+
+    def get_back_state(self):
+        return self._back_state
+
+
+class PlayingState(GameState):
+    def enter(self):
+        self._accumulator = 0.0
+        self.context._clock.tick()
+        self.context._input.clear(pygame.key.get_pressed())
+
+    def tick(self):
+        game = self.context
+        frame_time = game._clock.tick(RENDER_FPS) / 1000
+        self._accumulator += min(frame_time, MAX_FRAME_TIME)
+        game._profiler.begin("events")
+        poll_time = game.read_input()
+        game._profiler.end("events")
+        while self._accumulator >= TIMESTEP:
+            self._accumulator -= TIMESTEP
+            if not game.game_tick(game._input.consume(poll_time)):
+                game._profiler.end_frame()
+                game.game_over()
+                return
+        game._simulation.draw(self._accumulator / TIMESTEP)
+        game.present_frame()
+        game._profiler.end_frame()
 
 
 class Game(metaclass = Singleton):
     def __init__(self):
         pygame.init()
-        self._screen = pygame.display.set_mode((SCREENWIDTH, SCREENHEIGHT))
+        self._screen = pygame.display.get_surface()
+        if self._screen is None:
+            self._screen = pygame.display.set_mode((SCREENWIDTH, SCREENHEIGHT))
         self._font = pygame.freetype.Font("./data/Connection.otf", 24)
         pygame.display.set_caption("Frogger Game")
-        self._icon = pygame.image.load("./data/frog1.png")
+        self._icon = AssetCache().get("./data/frog1.png")
         pygame.display.set_icon(self._icon)
         self._clock = pygame.time.Clock()
+        self._profiler = FrameProfiler()
+        self._input = InputBuffer()
+        self._recorder = None
+        self._replay = None
+        self._simulation = None
+        self._exporter = None
+        if os.environ.get(CAPTURE_ENV):
+            self._exporter = FrameExporter(os.environ[CAPTURE_ENV], self._screen.get_size())
+            self._capture_surface = pygame.Surface(self._screen.get_size(), 0, self._screen)
+        self._spectators = None
+        if os.environ.get(SPECTATOR_ENV):
+            self._spectators = SpectatorServer(parse_address(os.environ[SPECTATOR_ENV]))
         self._caretaker = ScoreboardCaretaker(self)
         self._menu_creator = MenuFactory(self)
+        self._state = None
+        self._next_state = None
         self.start_menu()
 
+    def run(self):
+        while True:
+            self.step_state()
+
+    def step_state(self):
+        if self._next_state is not None:
+            self._state = self._next_state
+            self._next_state = None
+            self._state.context = self
+            self._state.enter()
+        self._state.tick()
+
+    def change_state(self, state):
+        self._next_state = state
+
+    def get_state(self):
+        if self._next_state is not None:
+            return self._next_state
+        return self._state
+
+    def go_back(self):
+        back_state = self._state.get_back_state()
+        if back_state is None:
+            self.start_menu()
+        else:
+            self.change_state(back_state)
+
+    def show_menu(self, menu, back_state=None):
+        self.change_state(MenuState(menu, back_state))
+
     def start_menu(self):
-        start_menu = self._menu_creator.create_start_menu()
-        start_menu.mainloop(self._screen)
+        self.show_menu(self._menu_creator.get_start_menu())
 
     def start_game(self):
-        self._objects_list = ScreenObjects(self._screen, self._font)
-        self._player = PlayerCharacter(267, 657, 4)
+        seed = random.getrandbits(64)
+        self.reset_simulation(seed)
+        self._recorder = SessionRecorder(LAST_REPLAY, seed)
+        self._replay = None
         self._lastscore = 0
-        self.populate_screen()
-        self.game_loop()
-
-    def populate_screen(self):
-        self._objects_list.set_player(self._player)
-        self._objects_list.add_drawable(self._player)
-        self._objects_list.add_drawable(Background())
-        self._objects_list.add_collidable(Water())
-        for i in range(4):
-            self._objects_list.add_collidable(House(i))
-        for i in range(5):
-            for j in range(2):
-                self._objects_list.add_movable(Car(i, j))
-        for i in range(2, 5):
-            for j in range(2):
-                self._objects_list.add_movable(WoodenLog(i, j))
-        for i in range(2):
-            self._objects_list.add_movable(Manatees(i))
-
-    def game_loop(self):
-        running = True
-        while running:
-            running = self.game_tick()
-            self._clock.tick(FPS)
-            pygame.display.update()
+        self.change_state(PlayingState())
+
+    def watch_replay(self):
+        try:
+            replay = SessionReplay(LAST_REPLAY)
+        except (OSError, ValueError):
+            return
+        self.reset_simulation(replay.get_seed())
+        self._recorder = None
+        self._replay = iter(replay)
+        self.change_state(PlayingState())
+
+    def reset_simulation(self, seed):
+        if self._simulation is None:
+            self._simulation = Simulation(seed, self._screen, self._font)
+            self._simulation.set_profiler(self._profiler)
+        else:
+            self._simulation.reset(seed)
+        if self._spectators is not None:
+            self._spectators.start_round(seed, DEFAULT_LEVEL, self._simulation.get_objects())
+
+    def game_over(self):
+        if self._replay is not None:
+            self._replay = None
+            self.game_end()
+            return
+        self._recorder.close()
+        self._recorder = None
         self.game_end()
 
-    def game_tick(self):
-        self._objects_list.move_objects()
-        self._objects_list.draw_objects()
-        player_collisions = self._objects_list.collide_objects()
-        if player_collisions != None:
-            if player_collisions == -1:
-                return False
-            else:
-                self._lastscore = player_collisions
-                return False
-        for event in pygame.event.get():
+    def present_frame(self):
+        dirty_rects = self._simulation.get_objects().get_dirty_rects()
+        if self._profiler.is_overlay_visible():
+            overlay_rect = self._profiler.draw_overlay(self._screen, self._font)
+            if dirty_rects is not None:
+                dirty_rects = dirty_rects + [overlay_rect]
+        self._profiler.begin("display")
+        pygame.display.update(dirty_rects)
+        self._profiler.end("display")
+
+    def poll_events(self):
+        events = pygame.event.get()
+        for event in events:
             if event.type == pygame.QUIT:
                 self.exit_game()
-        keys = pygame.key.get_pressed()
-        arrows = [keys[pygame.K_UP], keys[pygame.K_DOWN],
-                  keys[pygame.K_LEFT], keys[pygame.K_RIGHT]]
-        self._player.move(arrows)
+        return events
+
+    def read_input(self):
+        poll_time = pygame.time.get_ticks()
+        for event in self.poll_events():
+            if event.type == pygame.KEYDOWN and event.key == PROFILER_OVERLAY_KEY:
+                self._profiler.toggle_overlay()
+                self._simulation.get_objects().request_full_redraw()
+            elif event.type == pygame.KEYDOWN and event.key == PROFILER_EXPORT_KEY:
+                self.export_profile()
+            else:
+                self._input.push_event(event, poll_time)
+        return poll_time
+
+    def game_tick(self, arrows):
+        if self._replay is not None:
+            arrows = next(self._replay, None)
+            if arrows is None:
+                return False
+        elif self._recorder is not None:
+            self._recorder.record(arrows)
+        player_collisions = self._simulation.step(arrows, False)
+        if self._exporter is not None:
+            self._simulation.draw_to(self._capture_surface)
+            self._exporter.submit(self._capture_surface)
+        if self._spectators is not None:
+            self._spectators.publish(self._simulation.get_objects())
+            if player_collisions != None:
+                self._spectators.end_round(player_collisions)
+        if player_collisions != None:
+            if player_collisions != -1:
+                self._lastscore = player_collisions
+            return False
         return True
 
+    def export_profile(self):
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        path = os.path.join(PROFILE_DIR, time.strftime("trace-%Y%m%d-%H%M%S"))
+        self._profiler.export_json(path + ".json")
+        self._profiler.export_csv(path + ".csv")
+
     def game_end(self):
-        end_menu = self._menu_creator.create_end_menu(self._lastscore)
         scoreboard = self.load_scoreboard()
-        if scoreboard[-1].get_score() < self._lastscore:
-            end_menu.add.label("A new record!", font_color=(255, 255, 255))
-            end_menu.add.button(
-                'Save record', self.save_record_screen, scoreboard)
-        end_menu.mainloop(self._screen)
+        end_menu = self._menu_creator.get_end_menu(
+            self._lastscore, scoreboard[-1].get_score() < self._lastscore)
+        self.show_menu(end_menu)
 
     def scoreboard_menu(self):
-        scoreboard_screen = self._menu_creator.create_scoreboard_menu(
+        scoreboard_screen = self._menu_creator.get_scoreboard_menu(
             self.load_scoreboard())
-        scoreboard_screen.mainloop(self._screen)
+        self.show_menu(scoreboard_screen, self.get_state())
 
     def load_scoreboard(self):
         return self._caretaker.restore()
 
-    def save_record_screen(self, scoreboard):
-        save_menu = self._menu_creator.create_save_menu(scoreboard)
-        save_menu.mainloop(self._screen)
+    def save_record_screen(self):
+        save_menu = self._menu_creator.get_save_menu()
+        self.show_menu(save_menu, self.get_state())
 
-    def save_record(self, name, scoreboard):
-        scoreboard[4] = Highscore(self._lastscore, name)
-        scoreboard.sort(reverse=True)
-        self._caretaker.create(scoreboard)
+    def save_record(self, name):
+        if not validate_session(LAST_REPLAY, self._lastscore):
+            self.start_menu()
+            return
+        self._caretaker.create(Highscore(self._lastscore, name))
         self.start_menu()
 
     def exit_game(self):
+        self._caretaker.close()
+        if self._exporter is not None:
+            self._exporter.close()
+        if self._spectators is not None:
+            self._spectators.close()
         pygame.display.quit()
         pygame.quit()
         sys.exit()
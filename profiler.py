@@ -0,0 +1,96 @@
+import csv
+import json
+import time
+from collections import deque
+import pygame
+from gamesettings import *
+
+
+class NullProfiler():
+    def begin(self, name):
+        pass
+
+    def end(self, name):
+        pass
+
+
+class FrameProfiler(NullProfiler):
+    SECTIONS = ("events", "move", "draw", "score", "collide", "display", "frame")
+
+    def __init__(self, window=PROFILER_WINDOW):
+        self._window = window
+        self._samples = {}
+        for name in self.SECTIONS:
+            self._samples[name] = deque(maxlen=window)
+        self._frame = dict.fromkeys(self.SECTIONS, 0)
+        self._starts = {}
+        self._trace = deque(maxlen=window)
+        self._frame_start = time.perf_counter_ns()
+        self._overlay_visible = False
+        self._overlay = None
+        self._overlay_age = 0
+
+    def begin(self, name):
+        self._starts[name] = time.perf_counter_ns()
+
+    def end(self, name):
+        self._frame[name] += time.perf_counter_ns() - self._starts[name]
+
+    def end_frame(self):
+        now = time.perf_counter_ns()
+        self._frame["frame"] = now - self._frame_start
+        self._frame_start = now
+        for name, elapsed in self._frame.items():
+            self._samples[name].append(elapsed)
+        self._trace.append(self._frame)
+        self._frame = dict.fromkeys(self.SECTIONS, 0)
+
+    def get_percentiles(self, name):
+        samples = sorted(self._samples[name])
+        if not samples:
+            return (0.0, 0.0, 0.0)
+        last = len(samples) - 1
+        return tuple(samples[round(last * q)] / 1e6 for q in (0.5, 0.95, 0.99))
+
+    def get_summary(self):
+        summary = {}
+        for name in self.SECTIONS:
+            p50, p95, p99 = self.get_percentiles(name)
+            summary[name] = {"p50_ms": p50, "p95_ms": p95, "p99_ms": p99}
+        return summary
+
+    def toggle_overlay(self):
+        self._overlay_visible = not self._overlay_visible
+        self._overlay = None
+        return self._overlay_visible
+
+    def is_overlay_visible(self):
+        return self._overlay_visible
+
+    def draw_overlay(self, screen, font):
+        if self._overlay is None or self._overlay_age >= PROFILER_OVERLAY_REFRESH:
+            self._overlay = self.render_overlay(font)
+            self._overlay_age = 0
+        self._overlay_age += 1
+        return screen.blit(self._overlay, (0, 0))
+
+    def render_overlay(self, font):
+        lines = ["%-8s %6s %6s %6s" % ("ms", "p50", "p95", "p99")]
+        for name in self.SECTIONS:
+            lines.append("%-8s %6.2f %6.2f %6.2f" % (name, *self.get_percentiles(name)))
+        overlay = pygame.Surface((220, 16 * len(lines) + 8))
+        overlay.fill((0, 0, 0))
+        for row, line in enumerate(lines):
+            font.render_to(overlay, (6, 6 + 16 * row), line, (255, 255, 0), size=12)
+        return overlay
+
+    def export_json(self, path):
+        with open(path, 'w') as f:
+            json.dump({"summary": self.get_summary(),
+                       "frames_ns": list(self._trace)}, f, indent=1)
+
+    def export_csv(self, path):
+        with open(path, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=self.SECTIONS)
+            writer.writeheader()
+            writer.writerows(self._trace)
@@ -0,0 +1,121 @@
+import os
+import struct
+from gamesettings import *
+from simulation import Simulation
+
+REPLAY_MAGIC = b"FRGR"
+REPLAY_VERSION = 1
+REPLAY_HEADER = struct.Struct("<4sB3xQI")
+REPLAY_TICKS_OFFSET = 16
+REPLAY_TICKS = struct.Struct("<I")
+ARROW_TABLE = tuple(
+    (bool(bits & 1), bool(bits & 2), bool(bits & 4), bool(bits & 8))
+    for bits in range(16))
+
+
+def pack_arrows(arrows):
+    bits = 0
+    if arrows[0]:
+        bits |= 1
+    if arrows[1]:
+        bits |= 2
+    if arrows[2]:
+        bits |= 4
+    if arrows[3]:
+        bits |= 8
+    return bits
+
+
+class SessionRecorder():
+    def __init__(self, path, seed, buffer_size=REPLAY_BUFFER_SIZE, flush_ticks=REPLAY_FLUSH_TICKS):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(path, 'wb')
+        self._file.write(REPLAY_HEADER.pack(REPLAY_MAGIC, REPLAY_VERSION, seed, 0))
+        self._file.flush()
+        self._buffer = bytearray(buffer_size)
+        self._view = memoryview(self._buffer)
+        self._nibbles = 0
+        self._flushed = 0
+        self._ticks = 0
+        self._flush_ticks = flush_ticks
+
+    def record(self, arrows):
+        bits = pack_arrows(arrows)
+        index = self._nibbles >> 1
+        if self._nibbles & 1:
+            self._buffer[index] |= bits << 4
+        else:
+            self._buffer[index] = bits
+        self._nibbles += 1
+        self._ticks += 1
+        if self._nibbles == 2 * len(self._buffer):
+            self.flush()
+            self._nibbles = 0
+            self._flushed = 0
+        elif self._ticks % self._flush_ticks == 0:
+            self.flush()
+
+    def flush(self):
+        end = self._nibbles >> 1
+        self._file.write(self._view[self._flushed:end])
+        self._flushed = end
+        self._file.seek(REPLAY_TICKS_OFFSET)
+        self._file.write(REPLAY_TICKS.pack(self._ticks - (self._nibbles & 1)))
+        self._file.seek(0, os.SEEK_END)
+        self._file.flush()
+
+    def get_ticks(self):
+        return self._ticks
+
+    def close(self):
+        if self._file is None:
+            return
+        self._file.write(self._view[self._flushed:(self._nibbles + 1) >> 1])
+        self._file.seek(REPLAY_TICKS_OFFSET)
+        self._file.write(REPLAY_TICKS.pack(self._ticks))
+        self._file.close()
+        self._file = None
+
+
+class SessionReplay():
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            header = f.read(REPLAY_HEADER.size)
+            self._data = f.read()
+        if len(header) < REPLAY_HEADER.size:
+            raise ValueError("replay file is truncated")
+        magic, version, self._seed, self._ticks = REPLAY_HEADER.unpack(header)
+        if magic != REPLAY_MAGIC or version != REPLAY_VERSION:
+            raise ValueError("not a replay file: " + path)
+        if self._ticks > 2 * len(self._data):
+            raise ValueError("replay file is truncated")
+
+    def get_seed(self):
+        return self._seed
+
+    def get_ticks(self):
+        return self._ticks
+
+    def __iter__(self):
+        data = self._data
+        for tick in range(self._ticks):
+            byte = data[tick >> 1]
+            if tick & 1:
+                yield ARROW_TABLE[byte >> 4]
+            else:
+                yield ARROW_TABLE[byte & 15]
+
+
+def replay_session(path):
+    replay = SessionReplay(path)
+    simulation = Simulation(replay.get_seed())
+    return simulation.run(replay)
+
+
+def validate_session(path, score):
+    try:
+        return replay_session(path) == score
+    except (OSError, ValueError):
+        return False
@@ -0,0 +1,165 @@
+import atexit
+import bisect
+import logging
+import os
+import sqlite3
+import threading
+import time
+from gamesettings import *
+
+logger = logging.getLogger(__name__)
+
+
+class ScoreStore():
+    def __init__(self, path=SCORE_DATABASE):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._path = path
+        self._connection = sqlite3.connect(
+            path, timeout=SCORE_STORE_TIMEOUT, isolation_level=None,
+            check_same_thread=False)
+        self._connection.execute("PRAGMA synchronous=FULL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS scores ("
+            "id INTEGER PRIMARY KEY, score INTEGER NOT NULL, "
+            "name TEXT NOT NULL, created REAL NOT NULL)")
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS scores_by_score ON scores (score DESC, id)")
+
+    def get_path(self):
+        return self._path
+
+    def add(self, score, name):
+        self.add_many([(score, name)])
+
+    def add_many(self, entries):
+        now = time.time()
+        self._connection.execute("BEGIN IMMEDIATE")
+        try:
+            self._connection.executemany(
+                "INSERT INTO scores (score, name, created) VALUES (?, ?, ?)",
+                [(score, name, now) for score, name in entries])
+            self._connection.execute("COMMIT")
+        except BaseException:
+            if self._connection.in_transaction:
+                self._connection.execute("ROLLBACK")
+            raise
+
+    def top(self, k):
+        return self._connection.execute(
+            "SELECT score, name FROM scores ORDER BY score DESC, id LIMIT ?",
+            (k,)).fetchall()
+
+    def rows(self):
+        return self._connection.execute(
+            "SELECT id, score, name FROM scores ORDER BY score DESC, id").fetchall()
+
+    def count(self):
+        return self._connection.execute("SELECT COUNT(*) FROM scores").fetchone()[0]
+
+    def close(self):
+        self._connection.close()
+
+
+class ScoreboardService():
+    def __init__(self, store):
+        self._store = store
+        self._store_lock = threading.Lock()
+        self._lock = threading.Condition()
+        self._ranking = []
+        self._pending = []
+        self._pending_id = 1 << 62
+        self._version = None
+        self._closed = False
+        self.reload()
+        self._writer = threading.Thread(target=self.run_writer, daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    def get_version(self):
+        try:
+            stat = os.stat(self._store.get_path())
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def reload(self):
+        with self._store_lock:
+            version = self.get_version()
+            ranking = [(-score, id, name) for id, score, name in self._store.rows()]
+            with self._lock:
+                ranking.extend(self._pending)
+                ranking.sort()
+                self._ranking = ranking
+                self._version = version
+
+    def refresh(self):
+        if self.get_version() != self._version:
+            self.reload()
+
+    def top(self, k):
+        self.refresh()
+        with self._lock:
+            return [(-score, name) for score, id, name in self._ranking[:k]]
+
+    def count(self):
+        with self._lock:
+            return len(self._ranking)
+
+    def add(self, score, name):
+        with self._lock:
+            entry = (-score, self._pending_id, name)
+            self._pending_id += 1
+            bisect.insort(self._ranking, entry)
+            self._pending.append(entry)
+            self._lock.notify_all()
+
+    def run_writer(self):
+        while True:
+            with self._lock:
+                while not self._pending and not self._closed:
+                    self._lock.wait()
+                if not self._pending:
+                    return
+            time.sleep(SCORE_FLUSH_DELAY)
+            with self._lock:
+                batch = list(self._pending)
+            try:
+                with self._store_lock:
+                    self._store.add_many([(-score, name) for score, id, name in batch])
+                    with self._lock:
+                        del self._pending[:len(batch)]
+                        self._lock.notify_all()
+            except sqlite3.Error as error:
+                if self._closed:
+                    self.report_unsaved(error)
+                    return
+                continue
+            self.reload()
+
+    def report_unsaved(self, error):
+        pending = self.get_pending()
+        logger.error("could not save %d highscores to %s (%s): %s",
+                     len(pending), self._store.get_path(), error,
+                     ", ".join("%s %d" % (name, score) for score, name in pending))
+
+    def get_pending(self):
+        with self._lock:
+            return [(-score, name) for score, id, name in self._pending]
+
+    def flush(self):
+        with self._lock:
+            while self._pending and self._writer.is_alive():
+                self._lock.wait()
+
+    def close(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._lock.notify_all()
+        self._writer.join()
+        with self._store_lock:
+            self._store.close()
+        atexit.unregister(self.close)
@@ -0,0 +1,97 @@
+import random
+from gameobjects import *
+from gamesettings import *
+from levels import load_level
+from profiler import NullProfiler
+from spriteatlas import SpriteAtlas
+
+
+class Simulation():
+    def __init__(self, seed=None, screen=None, font=None, level=DEFAULT_LEVEL):
+        self._seed = seed
+        if isinstance(level, str):
+            level = load_level(level)
+        self._level = level
+        self._pool = ObjectPool()
+        self._objects_list = None
+        self._screen = screen
+        self._font = font
+        self._profiler = NullProfiler()
+        self.reset()
+
+    def reset(self, seed=None):
+        if seed is not None:
+            self._seed = seed
+        self._rng = random.Random(self._seed)
+        if self._objects_list is not None:
+            self._objects_list.release_objects(self._pool)
+        self._objects_list = ScreenObjects(self._screen, self._font)
+        self._objects_list.set_profiler(self._profiler)
+        self._player = self._level.create_player(self._pool)
+        self._ticks = 0
+        self._result = None
+        self.populate_screen()
+
+    def populate_screen(self):
+        self._level.populate(self._objects_list, self._player, self._rng, self._pool)
+        if self._screen is not None:
+            SpriteAtlas().require_flipped(self._level.get_flipped_sprites())
+
+    def set_profiler(self, profiler):
+        self._profiler = profiler
+        self._objects_list.set_profiler(profiler)
+
+    def get_objects(self):
+        return self._objects_list
+
+    def get_player(self):
+        return self._player
+
+    def get_pool(self):
+        return self._pool
+
+    def get_level(self):
+        return self._level
+
+    def get_seed(self):
+        return self._seed
+
+    def get_ticks(self):
+        return self._ticks
+
+    def get_result(self):
+        return self._result
+
+    def is_done(self):
+        return self._result is not None
+
+    def step(self, arrows, render=True):
+        self._profiler.begin("move")
+        self._objects_list.move_objects()
+        self._profiler.end("move")
+        if render and self._screen is not None:
+            self.draw()
+        self._objects_list.update_score()
+        self._ticks += 1
+        self._profiler.begin("collide")
+        player_collisions = self._objects_list.collide_objects()
+        self._profiler.end("collide")
+        if player_collisions != None:
+            self._result = player_collisions
+            return player_collisions
+        self._player.move(arrows)
+        return None
+
+    def draw(self, alpha=1.0):
+        self._profiler.begin("draw")
+        self._objects_list.draw_objects(alpha)
+        self._profiler.end("draw")
+
+    def draw_to(self, surface):
+        self._objects_list.draw_to(surface)
+
+    def run(self, inputs, render=False):
+        for arrows in inputs:
+            if self.step(arrows, render) != None:
+                break
+        return self._result
@@ -0,0 +1,337 @@
+import asyncio
+import os
+import struct
+import sys
+import threading
+import pygame
+import pygame.freetype
+from gameobjects import *
+from gamesettings import *
+from simulation import Simulation
+
+SPECTATOR_VERSION = 1
+MESSAGE_LENGTH = struct.Struct("<H")
+HELLO = struct.Struct("<BBQIH")
+STATE = struct.Struct("<BB")
+END = struct.Struct("<Bi")
+PLAYER = struct.Struct("<hh")
+LIVES = struct.Struct("<b")
+SCORE = struct.Struct("<i")
+HOUSES = struct.Struct("<I")
+PHASE_COUNT = struct.Struct("<H")
+
+MESSAGE_HELLO = 1
+MESSAGE_STATE = 2
+MESSAGE_END = 3
+
+FIELD_PLAYER = 1
+FIELD_LIVES = 2
+FIELD_SCORE = 4
+FIELD_HOUSES = 8
+FIELD_PHASES = 16
+FIELD_SNAPSHOT = 32
+
+
+def parse_address(text):
+    if text.startswith("unix:"):
+        return text[5:]
+    host, _, port = text.rpartition(":")
+    return (host or SPECTATOR_HOST, int(port))
+
+
+def get_manatees(objects):
+    return [object for object in objects.get_movables() if isinstance(object, Manatees)]
+
+
+def get_houses(objects):
+    return [object for object in objects.get_collidables() if isinstance(object, House)]
+
+
+def capture_state(objects, manatees, houses):
+    rect = objects.get_player().get_rect()
+    mask = 0
+    for index, house in enumerate(houses):
+        if house.is_visible():
+            mask |= 1 << index
+    return (rect.x, rect.y, objects.get_lives(), objects.get_score(), mask,
+            tuple(group.get_phase_ticks() for group in manatees))
+
+
+def predict_state(state, tables):
+    x, y, lives, score, houses, phases = state
+    return (x, y, lives, score - 1, houses,
+            tuple(table.get_steps()[phase][0] for table, phase in zip(tables, phases)))
+
+
+def encode_message(payload):
+    return MESSAGE_LENGTH.pack(len(payload)) + payload
+
+
+def encode_hello(seed, tick, level):
+    level = level.encode()
+    return encode_message(
+        HELLO.pack(MESSAGE_HELLO, SPECTATOR_VERSION, seed, tick, len(level)) + level)
+
+
+def encode_state(state, predicted=None, snapshot=False):
+    x, y, lives, score, houses, phases = state
+    flags = FIELD_SNAPSHOT if snapshot else 0
+    parts = []
+    if predicted is None or (x, y) != predicted[:2]:
+        flags |= FIELD_PLAYER
+        parts.append(PLAYER.pack(x, y))
+    if predicted is None or lives != predicted[2]:
+        flags |= FIELD_LIVES
+        parts.append(LIVES.pack(lives))
+    if predicted is None or score != predicted[3]:
+        flags |= FIELD_SCORE
+        parts.append(SCORE.pack(score))
+    if predicted is None or houses != predicted[4]:
+        flags |= FIELD_HOUSES
+        parts.append(HOUSES.pack(houses))
+    if predicted is None or phases != predicted[5]:
+        flags |= FIELD_PHASES
+        parts.append(PHASE_COUNT.pack(len(phases)))
+        parts.append(struct.pack("<%dH" % len(phases), *phases))
+    return encode_message(STATE.pack(MESSAGE_STATE, flags) + b"".join(parts))
+
+
+def decode_state(payload, predicted):
+    _, flags = STATE.unpack_from(payload)
+    offset = STATE.size
+    if predicted is None:
+        predicted = (0, 0, 0, 0, 0, ())
+    x, y, lives, score, houses, phases = predicted
+    if flags & FIELD_PLAYER:
+        x, y = PLAYER.unpack_from(payload, offset)
+        offset += PLAYER.size
+    if flags & FIELD_LIVES:
+        lives, = LIVES.unpack_from(payload, offset)
+        offset += LIVES.size
+    if flags & FIELD_SCORE:
+        score, = SCORE.unpack_from(payload, offset)
+        offset += SCORE.size
+    if flags & FIELD_HOUSES:
+        houses, = HOUSES.unpack_from(payload, offset)
+        offset += HOUSES.size
+    if flags & FIELD_PHASES:
+        count, = PHASE_COUNT.unpack_from(payload, offset)
+        phases = struct.unpack_from("<%dH" % count, payload, offset + PHASE_COUNT.size)
+    return (x, y, lives, score, houses, phases), bool(flags & FIELD_SNAPSHOT)
+
+
+class SpectatorServer():
+    def __init__(self, address):
+        self._address = address
+        self._clients = set()
+        self._dropped = 0
+        self._seed = None
+        self._level = None
+        self._tables = ()
+        self._tick = 0
+        self._state = None
+        self._manatees = ()
+        self._houses = ()
+        self._loop = asyncio.new_event_loop()
+        self._ready = threading.Event()
+        self._error = None
+        self._thread = threading.Thread(target=self.run, daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        if self._error is not None:
+            raise self._error
+
+    def run(self):
+        asyncio.set_event_loop(self._loop)
+        try:
+            if isinstance(self._address, str):
+                server = self._loop.run_until_complete(
+                    asyncio.start_unix_server(self.handle_client, path=self._address))
+            else:
+                server = self._loop.run_until_complete(
+                    asyncio.start_server(self.handle_client, *self._address))
+        except OSError as error:
+            self._error = error
+            self._ready.set()
+            return
+        self._bound = server.sockets[0].getsockname()
+        self._ready.set()
+        self._loop.run_forever()
+        server.close()
+        for writer in self._clients:
+            writer.transport.abort()
+        self._loop.run_until_complete(server.wait_closed())
+        self._loop.close()
+
+    def get_address(self):
+        return self._bound
+
+    def get_clients(self):
+        return len(self._clients)
+
+    def get_dropped(self):
+        return self._dropped
+
+    def start_round(self, seed, level, objects):
+        self._manatees = get_manatees(objects)
+        self._houses = get_houses(objects)
+        tables = tuple(group.get_table() for group in self._manatees)
+        self._loop.call_soon_threadsafe(self.begin_round, seed, level, tables)
+
+    def publish(self, objects):
+        state = capture_state(objects, self._manatees, self._houses)
+        self._loop.call_soon_threadsafe(self.broadcast_state, state)
+
+    def end_round(self, result):
+        self._loop.call_soon_threadsafe(self.broadcast, encode_message(END.pack(MESSAGE_END, result)))
+
+    def close(self):
+        if self._thread.is_alive():
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+        if isinstance(self._address, str) and os.path.exists(self._address):
+            os.remove(self._address)
+
+    def begin_round(self, seed, level, tables):
+        self._seed = seed
+        self._level = level
+        self._tables = tables
+        self._tick = 0
+        self._state = None
+        self.broadcast(encode_hello(seed, 0, level))
+
+    def broadcast_state(self, state):
+        predicted = None
+        if self._state is not None:
+            predicted = predict_state(self._state, self._tables)
+        self._state = state
+        self._tick += 1
+        self.broadcast(encode_state(state, predicted))
+
+    def broadcast(self, data):
+        for writer in list(self._clients):
+            if writer.transport.get_write_buffer_size() > SPECTATOR_MAX_BUFFER:
+                self.drop(writer)
+            else:
+                writer.write(data)
+
+    def drop(self, writer):
+        self._clients.discard(writer)
+        writer.transport.abort()
+        self._dropped += 1
+
+    async def handle_client(self, reader, writer):
+        if self._seed is not None:
+            writer.write(encode_hello(self._seed, self._tick, self._level))
+            if self._state is not None:
+                writer.write(encode_state(self._state, snapshot=True))
+        self._clients.add(writer)
+        try:
+            while await reader.read(1024):
+                pass
+        except ConnectionError:
+            pass
+        finally:
+            self._clients.discard(writer)
+            writer.close()
+
+
+class SpectatorClient():
+    def __init__(self, screen=None, font=None):
+        self._screen = screen
+        self._font = font
+        self._simulation = None
+        self._state = None
+        self._tick = 0
+        self._result = None
+
+    def get_simulation(self):
+        return self._simulation
+
+    def get_tick(self):
+        return self._tick
+
+    def get_result(self):
+        return self._result
+
+    def handle(self, payload):
+        kind = payload[0]
+        if kind == MESSAGE_HELLO:
+            _, version, seed, tick, length = HELLO.unpack_from(payload)
+            if version != SPECTATOR_VERSION:
+                raise ValueError("unsupported spectator protocol version %d" % version)
+            self.start_round(seed, tick, payload[HELLO.size:HELLO.size + length].decode())
+        elif kind == MESSAGE_STATE and self._simulation is not None:
+            self.apply_state(payload)
+        elif kind == MESSAGE_END:
+            self._result = END.unpack_from(payload)[1]
+        return kind
+
+    def start_round(self, seed, tick, level):
+        self._simulation = Simulation(seed, self._screen, self._font, level)
+        objects = self._simulation.get_objects()
+        for _ in range(tick):
+            objects.move_objects()
+        self._manatees = get_manatees(objects)
+        self._houses = get_houses(objects)
+        self._tables = tuple(group.get_table() for group in self._manatees)
+        self._state = None
+        self._tick = tick
+        self._result = None
+
+    def apply_state(self, payload):
+        predicted = None
+        if self._state is not None:
+            predicted = predict_state(self._state, self._tables)
+        state, snapshot = decode_state(payload, predicted)
+        objects = self._simulation.get_objects()
+        if not snapshot:
+            objects.move_objects()
+            self._tick += 1
+        x, y, lives, score, houses, phases = state
+        objects.get_player().set_position(x, y)
+        objects.set_lives(lives)
+        objects.set_score(score)
+        for index, house in enumerate(self._houses):
+            house.set_visible(bool(houses & (1 << index)))
+        for group, phase in zip(self._manatees, phases):
+            group.set_phase_ticks(phase)
+        self._state = state
+
+    async def run(self, address):
+        if isinstance(address, str):
+            reader, writer = await asyncio.open_unix_connection(address)
+        else:
+            reader, writer = await asyncio.open_connection(*address)
+        try:
+            while True:
+                length, = MESSAGE_LENGTH.unpack(await reader.readexactly(MESSAGE_LENGTH.size))
+                kind = self.handle(await reader.readexactly(length))
+                if self._screen is not None and kind == MESSAGE_STATE:
+                    if not self.present():
+                        return
+        except asyncio.IncompleteReadError:
+            pass
+        finally:
+            writer.close()
+
+    def present(self):
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                return False
+        self._simulation.draw()
+        pygame.display.flip()
+        return True
+
+
+def main(address):
+    pygame.init()
+    screen = pygame.display.set_mode((SCREENWIDTH, SCREENHEIGHT))
+    pygame.display.set_caption("Frogger Spectator")
+    font = pygame.freetype.Font("./data/Connection.otf", 24)
+    asyncio.run(SpectatorClient(screen, font).run(parse_address(address)))
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1] if len(sys.argv) > 1 else os.environ[SPECTATOR_ENV])
@@ -0,0 +1,87 @@
+import glob
+import os
+import pygame
+from gamesettings import *
+from assetcache import AssetCache
+from singleton import Singleton
+
+
+class SpriteAtlas(metaclass = Singleton):
+    def __init__(self):
+        self._pages = None
+        self._areas = {}
+        self._flipped = frozenset()
+
+    def build(self, paths=None, flipped=(), width=ATLAS_WIDTH):
+        if pygame.display.get_surface() is None:
+            return False
+        if paths is None:
+            paths = sorted(glob.glob(os.path.join(ASSET_DIR, "*.png")))
+        flipped = frozenset(flipped)
+        pages = {}
+        for path in paths:
+            picture = AssetCache().get(path)
+            if picture.get_width() > ATLAS_MAX_SPRITE or picture.get_height() > ATLAS_MAX_SPRITE:
+                continue
+            pictures = [picture]
+            if path in flipped:
+                pictures.append(AssetCache().get(path, True))
+            for picture in pictures:
+                if picture.get_flags() & pygame.SRCALPHA:
+                    pages.setdefault(None, []).append(picture)
+                elif picture.get_colorkey() is not None:
+                    pages.setdefault(picture.get_colorkey(), []).append(picture)
+        self._flipped = flipped
+        self._pages = []
+        self._areas = {}
+        for colorkey, pictures in pages.items():
+            self.build_page(colorkey, pictures, width)
+        return True
+
+    def build_page(self, colorkey, pictures, width):
+        pictures.sort(key=lambda picture: -picture.get_height())
+        areas = {}
+        x = y = shelf = 0
+        for picture in pictures:
+            if x + picture.get_width() > width:
+                x = 0
+                y += shelf
+                shelf = 0
+            areas[picture] = pygame.Rect((x, y), picture.get_size())
+            x += picture.get_width()
+            shelf = max(shelf, picture.get_height())
+        if colorkey is None:
+            page = pygame.Surface((width, y + shelf), pygame.SRCALPHA).convert_alpha()
+            page.fill((0, 0, 0, 0))
+            for picture, area in areas.items():
+                page.blit(picture, area, special_flags=pygame.BLEND_RGBA_MAX)
+        else:
+            page = pygame.Surface((width, y + shelf)).convert()
+            page.fill(colorkey)
+            for picture, area in areas.items():
+                page.blit(picture, area)
+            page.set_colorkey(colorkey, pygame.RLEACCEL)
+        self._pages.append(page)
+        for picture, area in areas.items():
+            self._areas[picture] = (page, area)
+
+    def require_flipped(self, paths):
+        flipped = self._flipped.union(paths)
+        if self._pages is not None and flipped == self._flipped:
+            return True
+        return self.build(flipped=flipped)
+
+    def is_built(self):
+        return self._pages is not None
+
+    def get_pages(self):
+        return self._pages
+
+    def get_area(self, picture):
+        return self._areas.get(picture)
+
+    def get_blit(self, picture, rect):
+        entry = self._areas.get(picture)
+        if entry is None:
+            return (picture, rect)
+        return (entry[0], rect, entry[1])
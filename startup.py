@@ -0,0 +1,30 @@
+import glob
+import os
+import threading
+import time
+import pygame
+from assetcache import AssetCache
+from gamesettings import *
+
+
+def show_splash():
+    pygame.display.init()
+    screen = pygame.display.set_mode((SCREENWIDTH, SCREENHEIGHT))
+    pygame.display.set_caption("Frogger Game")
+    screen.blit(AssetCache().get(SPLASH_IMAGE), (0, 0))
+    pygame.display.flip()
+    return screen
+
+
+def start_preloading():
+    paths = sorted(glob.glob(os.path.join(ASSET_DIR, "*.png")))
+    loader = threading.Thread(
+        target=AssetCache().preload, args=(paths, False), daemon=True)
+    loader.start()
+    return loader
+
+
+def probe(stage):
+    if os.environ.get(STARTUP_PROBE) == stage:
+        print(stage, time.time(), flush=True)
+        os._exit(0)
@@ -0,0 +1,168 @@
+import multiprocessing
+import os
+import time
+import numpy as np
+from multiprocessing import shared_memory
+from simulation import Simulation
+from vectorworld import VectorWorld
+
+
+class SharedArray():
+    def __init__(self, shape, dtype, name=None):
+        size = int(np.prod(shape)) * np.dtype(dtype).itemsize
+        if name is None:
+            self._memory = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        else:
+            self._memory = shared_memory.SharedMemory(name=name)
+        self._owner = name is None
+        self._shape = shape
+        self._dtype = dtype
+        self.array = np.ndarray(shape, dtype=dtype, buffer=self._memory.buf)
+
+    def get_spec(self):
+        return (self._shape, self._dtype, self._memory.name)
+
+    def close(self):
+        self.array = None
+        self._memory.close()
+        if self._owner:
+            self._memory.unlink()
+
+
+class EnvWorker():
+    def __init__(self, start, stop, seed, num_envs, specs):
+        self._start = start
+        self._stop = stop
+        self._seed = seed
+        self._num_envs = num_envs
+        self._buffers = [SharedArray(*spec) for spec in specs]
+        actions, observations, rewards, dones = self._buffers
+        self._actions = actions.array[start:stop]
+        self._observations = observations.array[start:stop]
+        self._rewards = rewards.array[start:stop]
+        self._dones = dones.array[start:stop]
+        self._episodes = np.zeros(stop - start, dtype=np.int64)
+        self._simulations = [None] * (stop - start)
+        self.reset()
+
+    def create_world(self, env):
+        seed = int(self._seed + self._start + env + self._num_envs * self._episodes[env])
+        if self._simulations[env] is None:
+            self._simulations[env] = Simulation(seed)
+        else:
+            self._simulations[env].reset(seed)
+        return self._simulations[env].get_objects()
+
+    def reset(self):
+        self._world = VectorWorld(
+            [self.create_world(env) for env in range(self._stop - self._start)])
+        self._world.observe(self._observations)
+        self._rewards[:] = 0
+        self._dones[:] = False
+
+    def step(self):
+        goals = self._world.get_goals().copy()
+        lives = self._world.get_lives().copy()
+        finished = self._world.step(self._actions)
+        self._rewards[:] = (self._world.get_goals() - goals) - (lives - self._world.get_lives())
+        self._dones[:] = finished
+        if finished.any():
+            envs = np.flatnonzero(finished)
+            self._episodes[envs] += 1
+            self._world.reset_envs(envs, [self.create_world(env) for env in envs])
+        self._world.observe(self._observations)
+
+    def run(self, connection):
+        while True:
+            command = connection.recv()
+            start = time.perf_counter()
+            if command == "step":
+                self.step()
+            elif command == "reset":
+                self.reset()
+            elif command == "close":
+                break
+            connection.send(time.perf_counter() - start)
+        for buffer in self._buffers:
+            buffer.close()
+        connection.close()
+
+
+def run_worker(connection, start, stop, seed, num_envs, specs):
+    EnvWorker(start, stop, seed, num_envs, specs).run(connection)
+
+
+class VectorEnv():
+    def __init__(self, num_envs, workers=None, seed=0):
+        if workers is None:
+            workers = os.cpu_count() or 1
+        workers = max(1, min(workers, num_envs))
+        probe = VectorWorld([Simulation(seed).get_objects()])
+        self._num_envs = num_envs
+        self._actions = SharedArray((num_envs, 4), np.uint8)
+        self._observations = SharedArray(
+            (num_envs, probe.get_observation_size()), np.int32)
+        self._rewards = SharedArray((num_envs,), np.float32)
+        self._dones = SharedArray((num_envs,), np.bool_)
+        specs = [buffer.get_spec() for buffer in
+                 (self._actions, self._observations, self._rewards, self._dones)]
+        self._connections = []
+        self._processes = []
+        bounds = np.linspace(0, num_envs, workers + 1).astype(int)
+        for start, stop in zip(bounds[:-1], bounds[1:]):
+            parent, child = multiprocessing.Pipe()
+            process = multiprocessing.Process(
+                target=run_worker, daemon=True,
+                args=(child, int(start), int(stop), seed, num_envs, specs))
+            process.start()
+            self._connections.append(parent)
+            self._processes.append(process)
+        self._steps = 0
+        self._wall_time = 0.0
+        self._worker_time = 0.0
+        self.broadcast("reset")
+
+    def broadcast(self, command):
+        for connection in self._connections:
+            connection.send(command)
+        busy = 0.0
+        for connection in self._connections:
+            busy += connection.recv()
+        return busy
+
+    def reset(self):
+        self.broadcast("reset")
+        return self._observations.array
+
+    def step(self, actions):
+        start = time.perf_counter()
+        self._actions.array[:] = actions
+        self._worker_time += self.broadcast("step")
+        self._wall_time += time.perf_counter() - start
+        self._steps += self._num_envs
+        return self._observations.array, self._rewards.array, self._dones.array
+
+    def get_num_envs(self):
+        return self._num_envs
+
+    def get_workers(self):
+        return len(self._processes)
+
+    def get_stats(self):
+        if self._steps == 0:
+            return {"steps": 0, "steps_per_second": 0.0, "steps_per_second_per_core": 0.0}
+        return {"steps": self._steps,
+                "steps_per_second": self._steps / self._wall_time,
+                "steps_per_second_per_core": self._steps / self._worker_time}
+
+    def close(self):
+        for connection in self._connections:
+            connection.send("close")
+        for process in self._processes:
+            process.join()
+        for connection in self._connections:
+            connection.close()
+        for buffer in (self._actions, self._observations, self._rewards, self._dones):
+            buffer.close()
+        self._connections = []
+        self._processes = []
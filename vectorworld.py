@@ -0,0 +1,265 @@
+import numpy as np
+from gameobjects import *
+from gamesettings import *
+
+
+class VectorWorld():
+    PER_ENV = ("_px", "_py", "_pw", "_ph", "_pspeed", "_standing",
+               "_surface_speed", "_houses", "_x", "_w", "_limit", "_wrap",
+               "_stood_on", "_phase", "_lives", "_goals", "_score", "_done",
+               "_result", "_ticks")
+
+    def __init__(self, worlds):
+        self._envs = len(worlds)
+        self._layout = self.get_layout(worlds[0])
+        for world in worlds:
+            if self.get_layout(world) != self._layout:
+                raise ValueError("all worlds must share the same object layout")
+        self.build_player(worlds)
+        self.build_collidables(worlds)
+        self.build_movables(worlds)
+        self._lives = np.array([w.get_lives() for w in worlds], dtype=np.int64)
+        self._goals = np.array([w.get_goals() for w in worlds], dtype=np.int64)
+        self._score = np.array([w.get_score() for w in worlds], dtype=np.int64)
+        self._done = np.zeros(self._envs, dtype=bool)
+        self._result = np.zeros(self._envs, dtype=np.int64)
+        self._ticks = np.zeros(self._envs, dtype=np.int64)
+
+    def get_layout(self, world):
+        return ([type(object) for object in world.get_collidables()],
+                [type(object) for object in world.get_movables()])
+
+    def build_player(self, worlds):
+        players = [world.get_player() for world in worlds]
+        self._px = np.array([p.get_rect().x for p in players], dtype=np.int64)
+        self._py = np.array([p.get_rect().y for p in players], dtype=np.int64)
+        self._pw = np.array([p.get_rect().width for p in players], dtype=np.int64)
+        self._ph = np.array([p.get_rect().height for p in players], dtype=np.int64)
+        self._pspeed = np.array([p.get_speed() for p in players], dtype=np.int64)
+        self._standing = np.array([p.get_standing() for p in players], dtype=np.int64)
+        self._surface_speed = np.array(
+            [p.get_surface_speed() for p in players], dtype=np.float64)
+
+    def build_collidables(self, worlds):
+        self._collidable_kinds = []
+        self._collidable_rects = []
+        house_count = 0
+        for object in worlds[0].get_collidables():
+            if isinstance(object, Water):
+                self._collidable_kinds.append((Water, -1))
+            elif isinstance(object, House):
+                self._collidable_kinds.append((House, house_count))
+                house_count += 1
+            else:
+                raise ValueError("unsupported collidable " + type(object).__name__)
+            self._collidable_rects.append(tuple(object.get_rect()))
+        self._houses = np.zeros((self._envs, house_count), dtype=bool)
+        for env, world in enumerate(worlds):
+            houses = [o for o in world.get_collidables() if isinstance(o, House)]
+            for index, house in enumerate(houses):
+                self._houses[env, index] = house.is_visible()
+
+    def build_movables(self, worlds):
+        movables = [world.get_movables() for world in worlds]
+        count = len(movables[0])
+        shape = (self._envs, count)
+        self._x = np.zeros(shape, dtype=np.int64)
+        self._w = np.zeros(shape, dtype=np.int64)
+        self._limit = np.zeros(shape, dtype=np.int64)
+        self._wrap = np.zeros(shape, dtype=np.int64)
+        self._stood_on = np.zeros(shape, dtype=bool)
+        self._phase = np.zeros(shape, dtype=np.int64)
+        self._y = np.zeros(count, dtype=np.int64)
+        self._h = np.zeros(count, dtype=np.int64)
+        self._dx = np.zeros(count, dtype=np.int64)
+        self._support_speed = np.zeros(count, dtype=np.float64)
+        self._is_car = np.zeros(count, dtype=bool)
+        self._is_support = np.zeros(count, dtype=bool)
+        self._is_manatee = np.zeros(count, dtype=bool)
+        self._support_limit = np.zeros(count, dtype=np.int64)
+        self._period = np.ones(count, dtype=np.int64)
+        self._order = np.arange(count)
+        for env, objects in enumerate(movables):
+            for index, object in enumerate(objects):
+                rect = object.get_rect()
+                self._x[env, index] = rect.x
+                self._w[env, index] = rect.width
+                if isinstance(object, Car):
+                    self._limit[env, index] = SCREENWIDTH + rect.width
+                    self._wrap[env, index] = SCREENWIDTH + 80
+                elif isinstance(object, WoodenLog):
+                    self._limit[env, index] = SCREENWIDTH
+                    self._wrap[env, index] = SCREENWIDTH + rect.width
+                    self._stood_on[env, index] = object.is_stood_on()
+                elif isinstance(object, Manatees):
+                    self._wrap[env, index] = SCREENWIDTH + rect.width
+                    self._stood_on[env, index] = object.is_stood_on()
+                    self._phase[env, index] = object.get_phase_ticks()
+                else:
+                    raise ValueError("unsupported movable " + type(object).__name__)
+        for index, object in enumerate(movables[0]):
+            rect = object.get_rect()
+            self._y[index] = rect.y
+            self._h[index] = rect.height
+            self._dx[index] = int(object.get_speed())
+            if isinstance(object, Car):
+                self._is_car[index] = True
+            else:
+                self._is_support[index] = True
+                self._support_speed[index] = object.get_speed()
+            if isinstance(object, Manatees):
+                self._is_manatee[index] = True
+                table = object.get_table()
+                self._support_limit[index] = table.get_support_limit()
+                self._period[index] = table.get_period()
+
+    def get_envs(self):
+        return self._envs
+
+    def get_observation_size(self):
+        return 6 + self._houses.shape[1] + 2 * self._x.shape[1]
+
+    def observe(self, out=None):
+        if out is None:
+            out = np.zeros((self._envs, self.get_observation_size()), dtype=np.int32)
+        houses = self._houses.shape[1]
+        movables = self._x.shape[1]
+        out[:, 0] = self._px
+        out[:, 1] = self._py
+        out[:, 2] = self._lives
+        out[:, 3] = self._goals
+        out[:, 4] = self._score
+        out[:, 5] = self._standing
+        out[:, 6:6 + houses] = self._houses
+        out[:, 6 + houses:6 + houses + movables] = self._x
+        out[:, 6 + houses + movables:] = self._phase
+        return out
+
+    def reset_envs(self, envs, worlds):
+        fresh = VectorWorld(worlds)
+        if fresh._layout != self._layout:
+            raise ValueError("all worlds must share the same object layout")
+        for name in self.PER_ENV:
+            getattr(self, name)[envs] = getattr(fresh, name)
+
+    def get_player_positions(self):
+        return self._px, self._py
+
+    def get_positions(self):
+        return self._x
+
+    def get_phases(self):
+        return self._phase
+
+    def get_lives(self):
+        return self._lives
+
+    def get_goals(self):
+        return self._goals
+
+    def get_score(self):
+        return self._score
+
+    def get_houses(self):
+        return self._houses
+
+    def get_ticks(self):
+        return self._ticks
+
+    def get_done(self):
+        return self._done
+
+    def get_result(self):
+        return self._result
+
+    def step(self, arrows):
+        arrows = np.asarray(arrows, dtype=bool)
+        active = ~self._done
+        self.move_objects(active)
+        self._score -= active
+        self._ticks += active
+        outcome = self.collide_objects(active)
+        finished = self.apply_outcome(outcome)
+        self.move_player(active & ~finished, arrows)
+        return finished
+
+    def move_objects(self, active):
+        x = self._x + self._dx * active[:, None]
+        goes_left = self._dx < 0
+        x += self._wrap * (goes_left & (x + self._w < 0))
+        x -= self._wrap * (~goes_left & (x > self._limit))
+        self._x = x
+
+    def player_overlap(self, x, y, w, h):
+        px, py, pw, ph = self._px, self._py, self._pw, self._ph
+        if np.ndim(x) == 2:
+            px, py, pw, ph = px[:, None], py[:, None], pw[:, None], ph[:, None]
+        return (px < x + w) & (x < px + pw) & (py < y + h) & (y < py + ph)
+
+    def collide_objects(self, active):
+        outcome = np.zeros(self._envs, dtype=np.int64)
+        exited = ~active
+        for (kind, index), (x, y, w, h) in zip(self._collidable_kinds, self._collidable_rects):
+            overlap = self.player_overlap(x, y, w, h) & ~exited
+            if kind is Water:
+                hit = overlap & (self._standing == 0)
+                outcome[hit] = -1
+            else:
+                hit = overlap & ~self._houses[:, index]
+                self._houses[hit, index] = True
+                outcome[hit] = 1
+            exited |= hit
+
+        overlap = self.player_overlap(
+            self._x, self._y[None, :], self._w, self._h[None, :])
+        car_hit = overlap & self._is_car & ~exited[:, None]
+        hit = car_hit.any(axis=1)
+        outcome[hit] = -1
+        first_hit = np.where(hit, car_hit.argmax(axis=1), len(self._order))
+        update = ~exited[:, None] & (self._order < first_hit[:, None])
+
+        phase = self._phase
+        supporting = ~self._is_manatee | (phase < self._support_limit)
+        ticking = update & self._is_manatee
+        phase = phase + ticking
+        phase[phase == self._period] = 0
+        self._phase = phase
+        standing = overlap & supporting
+        mask = update & self._is_support
+        stand = standing & ~self._stood_on & mask
+        leave = ~standing & self._stood_on & mask
+        self._standing += stand.sum(axis=1) - leave.sum(axis=1)
+        self._surface_speed += ((stand * self._support_speed).sum(axis=1)
+                                - (leave * self._support_speed).sum(axis=1))
+        self._stood_on = (self._stood_on | stand) & ~leave
+        return outcome
+
+    def apply_outcome(self, outcome):
+        damaged = outcome == -1
+        rewarded = outcome == 1
+        home = damaged | rewarded
+        self._px[home] = 288
+        self._py[home] = 670
+        self._lives -= damaged
+        self._goals += rewarded
+        lost = damaged & (self._lives == 0)
+        won = rewarded & (self._goals == 4)
+        self._result[lost] = -1
+        self._result[won] = self._score[won] + 1000 * (self._lives[won] - 1)
+        finished = lost | won
+        self._done |= finished
+        return finished
+
+    def move_player(self, moving, arrows):
+        speed = self._pspeed
+        drift = moving & (self._px + self._pw < SCREENWIDTH) & (self._px > 0)
+        self._px += np.trunc(self._surface_speed).astype(np.int64) * drift
+        up = moving & (self._py > speed) & arrows[:, 0]
+        moving = moving & ~up
+        down = moving & (self._py + self._ph < SCREENHEIGHT - speed - 64) & arrows[:, 1]
+        moving = moving & ~down
+        left = moving & (self._px > speed) & arrows[:, 2]
+        moving = moving & ~left
+        right = moving & (self._px + self._pw < SCREENWIDTH - speed) & arrows[:, 3]
+        self._py += speed * (down.astype(np.int64) - up)
+        self._px += speed * (right.astype(np.int64) - left)